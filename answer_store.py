@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from faq_data import faqs
+from jsonl_log import append_jsonl
+from normalize import QUERY_NORMALIZATION_ENABLED, normalize_question
+
+load_dotenv()
+
+# Precomputed answers written by warm_answers.py and consulted before the live pipeline
+
+ANSWER_STORE_PATH = os.getenv("ANSWER_STORE_PATH", "answer_store.json")
+
+# Web and guidance answers older than this are stale; FAQ answers only go stale when faq_data changes
+
+ANSWER_STORE_WEB_MAX_AGE_HOURS = float(os.getenv("ANSWER_STORE_WEB_MAX_AGE_HOURS", "24"))
+
+# Live questions are appended here so warm_answers.py can mine them. Off unless set: questions are
+# free text from the public and can hold personal details
+
+QUESTION_LOG = os.getenv("QUESTION_LOG", "")
+
+# Size at which the question log is rotated to QUESTION_LOG + ".1", replacing the older one
+
+QUESTION_LOG_MAX_BYTES = int(os.getenv("QUESTION_LOG_MAX_BYTES", "5000000"))
+
+
+def question_key(question: str, normalize: bool = QUERY_NORMALIZATION_ENABLED) -> str:
+    """
+    Lookup key for a question: its normalised form, or without normalisation
+    lowercased, punctuation dropped, whitespace collapsed
+    """
+    if normalize:
+        return normalize_question(question)
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def faq_version() -> str:
+    """
+    Fingerprint of faq_data.faqs, so answers built from an older FAQ set can be spotted
+    """
+    return hashlib.sha1(json.dumps(faqs, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class AnswerStore:
+    """
+    JSON-file backed map from question key to a precomputed answer.
+
+    Each entry remembers where its answer came from ("faq", "web", "guidance"), when it
+    was computed and against which FAQ version, so stale entries are skipped
+    at lookup time. Hit and miss counts give the coverage of live traffic.
+    """
+
+    def __init__(self, path: str, web_max_age_hours: float = 24):
+        self.path = path
+        self.web_max_age = web_max_age_hours * 3600
+        self.current_faq_version = faq_version()
+        self.entries = {}
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "stale": 0, "misses": 0}
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as store_file:
+                self.entries = json.load(store_file).get("entries", {})
+            self._loaded_mtime = mtime
+            print(f"Loaded {len(self.entries)} precomputed answers from {self.path}")
+        except (OSError, ValueError) as e:
+            print(f"Error loading answer store {self.path}: {str(e)}")
+
+    def _reload_if_changed(self):
+        """
+        Pick up a store rewritten by warm_answers.py, checking the file at most every 30 seconds
+        """
+        now = time.monotonic()
+        if not self.path or now - self._checked_at < 30:
+            return
+        self._checked_at = now
+        try:
+            changed = os.path.getmtime(self.path) != self._loaded_mtime
+        except OSError:
+            return
+        if changed:
+            self.load()
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            data = {"faq_version": self.current_faq_version, "saved_at": time.time(), "entries": self.entries}
+            with open(tmp_path, "w", encoding="utf-8") as store_file:
+                json.dump(data, store_file, indent=1)
+        os.replace(tmp_path, self.path)
+        self._loaded_mtime = os.path.getmtime(self.path)
+
+    def is_stale(self, entry: dict, now: float = None) -> bool:
+        if entry.get("faq_version") != self.current_faq_version:
+            return True
+        if entry.get("source") != "faq":
+            return (now or time.time()) - entry.get("computed_at", 0) > self.web_max_age
+        return False
+
+    def put(self, question: str, answer: str, source: str, faq_id=None):
+        """
+        Store an answer under the question's own key.
+
+        Near-duplicates are never stored under another question's answer: a
+        word like "not" or "when" can change what the right answer is.
+
+        source is "faq" for answers from the FAQ database, "web" or "guidance" otherwise
+        """
+        entry = {
+            "question": question,
+            "answer": answer,
+            "source": source,
+            "faq_id": faq_id,
+            "computed_at": time.time(),
+            "faq_version": self.current_faq_version,
+        }
+        with self._lock:
+            self.entries[question_key(question)] = entry
+
+    def lookup(self, question: str):
+        """
+        The fresh precomputed entry for a question, or None
+        """
+        self._reload_if_changed()
+        key = question_key(question)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self.entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if self.is_stale(entry):
+                self._stats["stale"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self.entries)
+            stats["stale_entries"] = sum(1 for entry in self.entries.values() if self.is_stale(entry))
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else None
+        return stats
+
+
+def log_question(question: str, log_path: str = None):
+    """
+    Append a live question to QUESTION_LOG for the warm-up job, if the log is enabled
+    """
+    log_path = QUESTION_LOG if log_path is None else log_path
+    if not log_path:
+        return
+    try:
+        with _question_log_lock:
+            append_jsonl(log_path, {"ts": round(time.time(), 3), "question": question}, QUESTION_LOG_MAX_BYTES)
+    except OSError as e:
+        print(f"Error writing question log: {str(e)}")
+
+
+_question_log_lock = threading.Lock()
+
+answer_store = AnswerStore(ANSWER_STORE_PATH, ANSWER_STORE_WEB_MAX_AGE_HOURS)
@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AzureOpenAI
+
+from token_budget import estimate_tokens
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a call can't be paced or retried within its deadline
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` units a minute.
+
+    It holds at most burst_seconds worth of units, since Azure enforces its
+    per-minute quotas over shorter intervals. A per_minute of 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds) if per_minute else 0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float, deadline: float) -> float:
+        """
+        Take `amount` units, waiting for them if needed. Returns the time waited in seconds
+        """
+        if not self.capacity:
+            return 0.0
+        # A single request bigger than the bucket could never go through otherwise
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.level >= amount:
+                    self.level -= amount
+                    return now - started
+                wait = (amount - self.level) / self.rate
+                if now + wait > deadline:
+                    raise DeadlineExceeded(f"Rate limit pacing would take {wait:.1f}s, past the request deadline")
+                self._condition.wait(wait)
+
+    def clamp(self, remaining: float):
+        """
+        Lower the level to what the server says is left in the current window
+        """
+        if not self.capacity:
+            return
+        with self._condition:
+            self._refill(time.monotonic())
+            self.level = min(self.level, remaining)
+
+    def drain(self):
+        self.clamp(0)
+
+
+class RateLimitedClient:
+    """
+    AzureOpenAI wrapper that paces calls client-side and retries throttling and server errors.
+
+    Calls are paced by request and token buckets sized from the deployment's
+    RPM/TPM quota; the x-ratelimit-remaining-* headers of every response pull
+    the buckets down to what Azure reports. 429, 408/409 and 5xx responses and
+    connection errors are retried with exponential backoff and full jitter,
+    waiting at least as long as Retry-After / retry-after-ms asks, until
+    max_retries or the per-request deadline runs out.
+
+    Exposes client.chat.completions.create like AzureOpenAI, so it can be
+    passed anywhere the plain client is used.
+    """
+
+    def __init__(self, client: AzureOpenAI, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_retries: int = 5, deadline_seconds: float = 30, backoff_base: float = 0.5,
+                 backoff_max: float = 20, burst_seconds: float = 10):
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute, burst_seconds)
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "server_errors": 0,
+                       "failures": 0, "paced_seconds": 0.0, "backoff_seconds": 0.0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def create_chat_completion(self, deadline: float = None, failover_wait: float = None, **kwargs):
+        """
+        chat.completions.create with pacing and retries. deadline is an optional
+        time.monotonic() value overriding deadline_seconds.
+
+        failover_wait is for callers that have another endpoint to fall back
+        on: only 429s whose Retry-After is at most failover_wait seconds are
+        retried, and every other error is raised at once.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline_seconds
+        prompt = "\n".join(str(message.get("content", "")) for message in kwargs.get("messages", []))
+        # Azure counts max_tokens against the TPM quota up front
+        token_cost = estimate_tokens(prompt) + (kwargs.get("max_tokens") or 0)
+        self._count("calls")
+
+        attempt = 0
+        while True:
+            try:
+                paced = self.requests.acquire(1, deadline) + self.tokens.acquire(token_cost, deadline)
+            except DeadlineExceeded:
+                self._count("failures")
+                raise
+            self._count("paced_seconds", paced)
+            self._count("attempts")
+            remaining_time = max(1.0, deadline - time.monotonic())
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(timeout=remaining_time, **kwargs)
+                self._apply_headers(raw.headers)
+                return raw.parse()
+            except (APIStatusError, APIConnectionError, APITimeoutError) as e:
+                status = getattr(e, "status_code", None)
+                if status is not None and status not in RETRYABLE_STATUS_CODES:
+                    self._count("failures")
+                    raise
+                if status == 429:
+                    self._count("throttled")
+                    # Azure is out of quota for now, stop other threads from piling on
+                    self.requests.drain()
+                elif status is not None:
+                    self._count("server_errors")
+
+                headers = e.response.headers if isinstance(e, APIStatusError) else {}
+                self._apply_headers(headers)
+                delay = self._backoff(attempt, headers)
+                if failover_wait is not None:
+                    retry_after = _retry_after_seconds(headers)
+                    if status != 429 or retry_after is None or retry_after > failover_wait:
+                        self._count("failures")
+                        raise
+                if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+                    self._count("failures")
+                    raise
+
+                print(f"Azure call failed ({status or type(e).__name__}), retrying in {delay:.2f}s")
+                self._count("retries")
+                self._count("backoff_seconds", delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _backoff(self, attempt: int, headers) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = _retry_after_seconds(headers)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _apply_headers(self, headers):
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            self.requests.clamp(remaining_requests)
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self.tokens.clamp(remaining_tokens)
+
+
+def _header_number(headers, name: str):
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after_seconds(headers):
+    """
+    Wait requested by retry-after-ms or Retry-After (seconds), if any
+    """
+    retry_after_ms = _header_number(headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000.0
+    return _header_number(headers, "retry-after")
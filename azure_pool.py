@@ -0,0 +1,251 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from openai import APIStatusError, AzureOpenAI
+
+from azure_client import DeadlineExceeded, RateLimitedClient
+
+# Status codes that mean the request itself is bad, so another endpoint won't do better
+NON_FAILOVER_STATUS_CODES = {400, 413, 422}
+
+
+def load_endpoint_configs(endpoints_json: str, default_api_key: str = None, default_endpoint: str = None,
+                          default_deployment: str = None, default_api_version: str = None,
+                          default_requests_per_minute: float = 0, default_tokens_per_minute: float = 0) -> list:
+    """
+    Endpoint configs from AZURE_OPENAI_ENDPOINTS, or a single one from the plain settings.
+
+    AZURE_OPENAI_ENDPOINTS is a JSON list of objects with "endpoint" and
+    optionally "api_key", "deployment", "api_version", "weight", "name",
+    "requests_per_minute" and "tokens_per_minute"; missing fields fall back
+    to the single-endpoint settings.
+    """
+    if endpoints_json:
+        configs = json.loads(endpoints_json)
+        if not isinstance(configs, list) or not configs:
+            raise ValueError("AZURE_OPENAI_ENDPOINTS must be a non-empty JSON list")
+    elif default_endpoint:
+        configs = [{"endpoint": default_endpoint}]
+    else:
+        raise ValueError("AZURE_OPENAI_ENDPOINT is missing from environment variables")
+
+    resolved = []
+    for config in configs:
+        if not config.get("endpoint"):
+            raise ValueError(f"Azure endpoint config without an endpoint: {config}")
+        api_key = config.get("api_key") or default_api_key
+        if not api_key:
+            raise ValueError("AZURE_OPENAI_API_KEY is missing from environment variables")
+        resolved.append({
+            "name": config.get("name") or f"{config['endpoint']}#{config.get('deployment') or default_deployment}",
+            "endpoint": config["endpoint"],
+            "api_key": api_key,
+            "deployment": config.get("deployment") or default_deployment,
+            "api_version": config.get("api_version") or default_api_version,
+            "weight": float(config.get("weight", 1)),
+            "requests_per_minute": float(config.get("requests_per_minute", default_requests_per_minute)),
+            "tokens_per_minute": float(config.get("tokens_per_minute", default_tokens_per_minute)),
+        })
+    return resolved
+
+
+class PoolMember:
+    """
+    One endpoint/deployment pair with its latency, load and health bookkeeping
+    """
+
+    def __init__(self, config: dict, max_retries: int):
+        self.name = config["name"]
+        self.deployment = config["deployment"]
+        self.weight = max(config["weight"], 0.01)
+        self.raw_client = AzureOpenAI(
+            api_key=config["api_key"],
+            api_version=config["api_version"],
+            azure_endpoint=config["endpoint"],
+            max_retries=0
+        )
+        self.client = RateLimitedClient(
+            self.raw_client,
+            requests_per_minute=config["requests_per_minute"],
+            tokens_per_minute=config["tokens_per_minute"],
+            max_retries=max_retries
+        )
+        self.latency_ms = None
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.unhealthy_since = None
+        self.last_error = None
+
+    def stats(self) -> dict:
+        return {
+            "deployment": self.deployment,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else None,
+            "latency_ewma_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "client": self.client.stats(),
+        }
+
+
+class DeploymentPool:
+    """
+    Routes chat completions across several Azure endpoints/deployments with failover.
+
+    routing="latency" picks the healthy member with the lowest weighted
+    latency estimate (EWMA latency x (outstanding + 1) / weight), and
+    routing="outstanding" the one with the fewest in-flight calls per unit of
+    weight. Members with no latency yet are tried first. After
+    failure_threshold consecutive failures a member is taken out of rotation;
+    it gets a trial call again after cooldown_seconds, and a background
+    health check (every health_check_seconds, 0 to disable) probes it with a
+    one-token completion.
+
+    While another healthy member is left to try, a member fails over at once
+    on connection errors and 5xx, retrying only 429s that ask for a wait of
+    at most failover_retry_after seconds; the last healthy member retries
+    with its full max_retries. Request errors (400/413/422) are raised
+    without failover, and neither they nor client-side pacing timeouts count
+    against a member's health.
+
+    Exposes client.chat.completions.create like AzureOpenAI; the model
+    argument is replaced with each member's deployment.
+    """
+
+    def __init__(self, configs: list, routing: str = "latency", failure_threshold: int = 3,
+                 cooldown_seconds: float = 30, health_check_seconds: float = 0, max_retries: int = 1,
+                 deadline_seconds: float = 30, latency_alpha: float = 0.2, failover_retry_after: float = 2):
+        if routing not in ("latency", "outstanding"):
+            raise ValueError(f"Unknown routing strategy: {routing}")
+        self.routing = routing
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.deadline_seconds = deadline_seconds
+        self.latency_alpha = latency_alpha
+        self.failover_retry_after = failover_retry_after
+        self.members = [PoolMember(config, max_retries) for config in configs]
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+        if health_check_seconds > 0:
+            self._health_thread = threading.Thread(target=self._health_check_loop, args=(health_check_seconds,),
+                                                   name="azure-health-check", daemon=True)
+            self._health_thread.start()
+
+    def _score(self, member: PoolMember) -> tuple:
+        latency = member.latency_ms if member.latency_ms is not None else 0.0
+        if self.routing == "outstanding":
+            return ((member.outstanding + 1) / member.weight, latency)
+        return (latency * (member.outstanding + 1) / member.weight, member.outstanding)
+
+    def _candidates(self) -> list:
+        """
+        Members in the order they should be tried for the next call
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [m for m in self.members
+                         if m.healthy or now - m.unhealthy_since >= self.cooldown_seconds]
+            if not available:
+                # Everything is down; still try, longest-failed first, rather than failing outright
+                return sorted(self.members, key=lambda m: m.unhealthy_since)
+            return sorted(available, key=self._score)
+
+    def create_chat_completion(self, **kwargs):
+        deadline = time.monotonic() + self.deadline_seconds
+        last_error = None
+
+        candidates = self._candidates()
+        for position, member in enumerate(candidates):
+            if time.monotonic() >= deadline:
+                break
+            has_fallback = any(other.healthy for other in candidates[position + 1:])
+            call_kwargs = dict(kwargs)
+            if member.deployment:
+                call_kwargs["model"] = member.deployment
+
+            with self._lock:
+                member.outstanding += 1
+                member.requests += 1
+            started = time.perf_counter()
+            try:
+                response = member.client.create_chat_completion(
+                    deadline=deadline,
+                    failover_wait=self.failover_retry_after if has_fallback else None,
+                    **call_kwargs
+                )
+            except Exception as e:
+                if isinstance(e, APIStatusError) and e.status_code in NON_FAILOVER_STATUS_CODES:
+                    # The request itself is bad (content filter, context length), not the endpoint
+                    raise
+                if isinstance(e, DeadlineExceeded):
+                    print(f"Azure endpoint {member.name} is out of local quota, failing over")
+                else:
+                    self._record_failure(member, e)
+                    print(f"Azure endpoint {member.name} failed ({type(e).__name__}), failing over")
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    member.outstanding -= 1
+
+            self._record_success(member, (time.perf_counter() - started) * 1000)
+            return response
+
+        raise last_error or TimeoutError("No Azure endpoint answered before the deadline")
+
+    def _record_success(self, member: PoolMember, latency_ms: float):
+        with self._lock:
+            if member.latency_ms is None:
+                member.latency_ms = latency_ms
+            else:
+                member.latency_ms += self.latency_alpha * (latency_ms - member.latency_ms)
+            member.consecutive_failures = 0
+            if not member.healthy:
+                print(f"Azure endpoint {member.name} is healthy again")
+            member.healthy = True
+            member.unhealthy_since = None
+
+    def _record_failure(self, member: PoolMember, error: Exception):
+        with self._lock:
+            member.errors += 1
+            member.consecutive_failures += 1
+            member.last_error = f"{type(error).__name__}: {str(error)[:200]}"
+            if member.healthy and member.consecutive_failures >= self.failure_threshold:
+                print(f"Azure endpoint {member.name} taken out of rotation")
+                member.healthy = False
+            if not member.healthy:
+                # Restart the cooldown after a failed trial call
+                member.unhealthy_since = time.monotonic()
+
+    def _health_check_loop(self, interval: float):
+        while True:
+            time.sleep(interval)
+            for member in self.members:
+                if member.healthy:
+                    continue
+                started = time.perf_counter()
+                try:
+                    member.raw_client.chat.completions.create(
+                        model=member.deployment,
+                        messages=[{"role": "user", "content": "ping"}],
+                        max_tokens=1,
+                        timeout=10
+                    )
+                except Exception as e:
+                    self._record_failure(member, e)
+                    continue
+                self._record_success(member, (time.perf_counter() - started) * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"routing": self.routing, "endpoints": {member.name: member.stats() for member in self.members}}
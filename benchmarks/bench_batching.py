@@ -0,0 +1,91 @@
+"""
+Compare one-call-per-question FAQ matching against the micro-batching scheduler.
+
+Both sides use structured matching (FAQ_MATCH_MODE=structured), so the
+unbatched baseline also returns only an FAQ ID per call. Fires a burst of
+concurrent questions at the stub Azure server and reports throughput,
+latency percentiles and how many Azure calls were made, then asks
+--sequential questions one at a time to show the latency the batch window
+adds when there is nothing to coalesce.
+
+    python -m benchmarks.bench_batching --questions 64 --concurrency 32
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import AzureOpenAI
+
+from batching import FAQBatcher
+from benchmarks.stub_azure_server import StubAzureServer
+from evaluation.harness import percentile
+from faq_data import faqs
+import utils
+from token_budget import usage_recorder
+from utils import find_faq_answer
+
+
+def run_burst(answer, questions: list, concurrency: int) -> tuple:
+    latencies = []
+
+    def timed(question):
+        started = time.perf_counter()
+        answer(question)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, questions))
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--windows", default="10,15,25", help="Comma separated batch windows in ms")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--stub-concurrency", type=int, default=4)
+    parser.add_argument("--sequential", type=int, default=16, help="Questions asked one at a time at low load")
+    args = parser.parse_args()
+
+    # Stub calls should not end up in the real token usage log
+    usage_recorder.log_path = None
+    # Batches only return FAQ IDs, so compare against single-question ID lookups
+    utils.FAQ_MATCH_MODE = "structured"
+
+    stub = StubAzureServer(max_concurrency=args.stub_concurrency).start()
+    client = AzureOpenAI(api_key="stub", api_version="2023-12-01-preview", azure_endpoint=stub.url,
+                         max_retries=0)
+
+    questions = [faqs[i % len(faqs)]["question"] for i in range(args.questions)]
+
+    runs = [("unbatched", lambda question: find_faq_answer(question, client))]
+    for window in args.windows.split(","):
+        batcher = FAQBatcher(client, window_ms=float(window), max_batch_size=args.max_batch_size)
+        runs.append((f"batched {window}ms x{args.max_batch_size}", batcher.submit))
+
+    print(f"{'mode':<22} {'q/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'calls':>6}")
+    for name, answer in runs:
+        calls_before = stub.request_count
+        elapsed, latencies = run_burst(answer, questions, args.concurrency)
+        print(f"{name:<22} {len(questions) / elapsed:>8.1f} "
+              f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+              f"{stub.request_count - calls_before:>6}")
+
+    print(f"\nLow load, {args.sequential} questions one at a time:")
+    print(f"{'mode':<22} {'p50 ms':>8} {'p95 ms':>8} {'added ms':>9}")
+    baseline = None
+    for name, answer in runs:
+        _, latencies = run_burst(answer, questions[:args.sequential], 1)
+        p50 = statistics.median(latencies) * 1000
+        baseline = p50 if baseline is None else baseline
+        print(f"{name:<22} {p50:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} {p50 - baseline:>+9.0f}")
+
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Cost and hit-rate lift of query normalisation on a sample question log.
+
+The sample log is made from benchmarks/sample_questions.py, held out from
+the evaluation set and from the synonym map, each asked again in
+--variants noisy forms: different case and punctuation, curly quotes,
+contractions and keyboard typos (adjacent keys, swapped, dropped and
+doubled letters). No noise rewrites words the synonym map knows about. The
+answer store is warmed with the clean questions only, like warm_answers.py
+would, and then every logged question is looked up with raw and normalised
+keys. Local matching is scored the same way with an index built with and
+without normalisation.
+
+Before measuring, known over-corrections are checked; the script exits
+with status 1 if any regressed.
+
+    python -m benchmarks.bench_normalize --variants 5 --seed 7
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from answer_store import question_key
+from benchmarks.sample_questions import sample_questions
+from evaluation.harness import percentile
+from faq_data import faqs
+from normalize import get_typo_corrector, normalize_question
+from retrieval import FAQIndex
+
+# Expected normalised forms; real words must never be "corrected" into FAQ words
+
+REGRESSION_CASES = [
+    ("adoption", "adoption"),
+    ("mother", "mother"),
+    ("father", "father"),
+    ("patent", "patent"),
+    ("charge", "charge"),
+    ("Paris", "paris"),
+    ("London", "london"),
+    ("Texas", "texas"),
+    ("My son has a trial next week", "my son has a trial next week"),
+    ("The sentence was too long", "the sentence was too long"),
+    ("Does my kid need an attorney?", "does my child need an lawyer"),
+    ("Whats the diffrence between a juvinile delinquint and an ofender?",
+     "whats the difference between a juvenile delinquent and an offender"),
+    ("I’m being investigated by the Office of Special Investigations",
+     "i am being investigated by the osi"),
+]
+
+KEYBOARD_ROWS = ["qwertyuiop", "asdfghjkl", "zxcvbnm"]
+
+CONTRACTIONS = [("I am", "I'm"), ("do not", "don't"), ("does not", "doesn't"), ("is not", "isn't"),
+                ("What is", "What's"), ("can not", "can't"), ("will not", "won't")]
+
+
+def adjacent_key(char: str, rng: random.Random) -> str:
+    for row in KEYBOARD_ROWS:
+        i = row.find(char.lower())
+        if i >= 0:
+            neighbours = row[max(i - 1, 0):i] + row[i + 1:i + 2]
+            return rng.choice(neighbours)
+    return char
+
+
+def add_typo(text: str, rng: random.Random) -> str:
+    words = text.split()
+    long_words = [i for i, word in enumerate(words) if word.isalpha() and len(word) >= 6]
+    if not long_words:
+        return text
+    i = rng.choice(long_words)
+    word = words[i]
+    position = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(["adjacent", "swap", "drop", "double"])
+    if kind == "adjacent":
+        word = word[:position] + adjacent_key(word[position], rng) + word[position + 1:]
+    elif kind == "swap":
+        word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    elif kind == "drop":
+        word = word[:position] + word[position + 1:]
+    else:
+        word = word[:position] + word[position] + word[position:]
+    words[i] = word
+    return " ".join(words)
+
+
+def noisy_variant(question: str, rng: random.Random) -> str:
+    for expanded, contracted in CONTRACTIONS:
+        if expanded in question and rng.random() < 0.5:
+            question = question.replace(expanded, contracted)
+    if rng.random() < 0.6:
+        question = add_typo(question, rng)
+    if rng.random() < 0.3:
+        question = question.replace("'", "’")
+    case = rng.random()
+    if case < 0.3:
+        question = question.lower()
+    elif case < 0.4:
+        question = question.upper()
+    if rng.random() < 0.4:
+        question = question.rstrip("?.") + rng.choice(["", "??", " ?", "!", "..."])
+    return question
+
+
+def sample_log(variants: int, rng: random.Random) -> list:
+    """
+    (question, faq_id or None, clean question) for every noisy form of every sample question
+    """
+    return [(noisy_variant(item["question"], rng), item["faq_id"], item["question"])
+            for item in sample_questions for _ in range(variants)]
+
+
+def check_regressions() -> list:
+    failures = []
+    for question, expected in REGRESSION_CASES:
+        normalized = normalize_question(question)
+        if normalized != expected:
+            failures.append(f"{question!r}: expected {expected!r}, got {normalized!r}")
+    return failures
+
+
+def cache_hit_rate(log: list, normalize: bool) -> float:
+    warmed = {question_key(clean, normalize) for _, _, clean in log}
+    return sum(question_key(question, normalize) in warmed for question, _, _ in log) / len(log)
+
+
+def match_rate(log: list, index: FAQIndex, min_score: float) -> tuple:
+    """
+    Share of FAQ questions matched to the right FAQ, and of no-match questions left unmatched
+    """
+    correct = no_match_correct = answerable = 0
+    for question, faq_id, _ in log:
+        results = index.search(question, k=1, method="hybrid", min_score=min_score)
+        top = results[0][0] if results else None
+        if faq_id is None:
+            no_match_correct += top is None
+        else:
+            answerable += 1
+            correct += top == faq_id
+    unanswerable = len(log) - answerable
+    return correct / answerable, no_match_correct / unanswerable if unanswerable else 1.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", type=int, default=5, help="Noisy forms per sample question")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-score", type=float, default=0.28, help="Hybrid retrieval threshold")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    corrector = get_typo_corrector()
+    print(f"Typo corrector: {len(corrector.word_counts)} FAQ words, {len(corrector.known_words)} known words, "
+          f"{len(corrector.deletes)} deletes, built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    failures = check_regressions()
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print(f"Regression cases: {len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} ok")
+
+    log = sample_log(args.variants, random.Random(args.seed))
+    print(f"Sample log: {len(log)} questions, e.g. {log[1][0]!r}")
+
+    # Uncached cost, then the cost once the lru_cache has seen the question
+    cold = []
+    for question, _, _ in log:
+        started = time.perf_counter()
+        normalize_question.__wrapped__(question)
+        cold.append((time.perf_counter() - started) * 1e6)
+    normalize_question.cache_clear()
+    for question, _, _ in log:
+        normalize_question(question)
+    warm = []
+    for question, _, _ in log:
+        started = time.perf_counter()
+        normalize_question(question)
+        warm.append((time.perf_counter() - started) * 1e6)
+    print(f"Per-query cost: cold p50 {percentile(cold, 50):.0f} us, p95 {percentile(cold, 95):.0f} us; "
+          f"cached p50 {percentile(warm, 50):.1f} us")
+
+    raw_index, normalized_index = FAQIndex(faqs, normalize=False), FAQIndex(faqs, normalize=True)
+    print(f"{'keys':<12} {'cache hits':>11} {'match recall':>13} {'no-match acc':>13}")
+    for name, normalize, index in (("raw", False, raw_index), ("normalized", True, normalized_index)):
+        recall, no_match = match_rate(log, index, args.min_score)
+        print(f"{name:<12} {cache_hit_rate(log, normalize):>11.1%} {recall:>13.1%} {no_match:>13.1%}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Route FAQ lookups through a DeploymentPool of local stub Azure servers.
+
+Three stubs stand in for regions: a fast one, a slow one and a flaky one
+that fails half its calls. Halfway through, the fast one is shut down to
+show failover. Members keep the default per-endpoint retries main.py
+uses, so the latency after the shutdown shows what failover really costs.
+Prints per-endpoint traffic, errors and latency for each routing strategy.
+
+    python -m benchmarks.bench_pool --questions 80 --concurrency 8
+"""
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from azure_pool import DeploymentPool, load_endpoint_configs
+from benchmarks.stub_azure_server import StubAzureServer
+from evaluation.harness import percentile
+from faq_data import faqs
+from token_budget import usage_recorder
+from utils import match_faq_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=5, help="Per-endpoint retries, as AZURE_MAX_RETRIES")
+    args = parser.parse_args()
+
+    # Stub calls should not end up in the real token usage log
+    usage_recorder.log_path = None
+
+    questions = [faqs[i % len(faqs)]["question"] for i in range(args.questions)]
+
+    for routing in ("latency", "outstanding"):
+        stubs = {
+            "fast": StubAzureServer(base_ms=30, completion_token_ms=0).start(),
+            "slow": StubAzureServer(base_ms=150, completion_token_ms=0).start(),
+            "flaky": StubAzureServer(base_ms=60, completion_token_ms=0, error_rate=0.5).start(),
+        }
+        endpoints = [{"endpoint": stub.url, "name": name} for name, stub in stubs.items()]
+        configs = load_endpoint_configs(json.dumps(endpoints), default_api_key="stub", default_deployment="stub",
+                                        default_api_version="2023-12-01-preview")
+        pool = DeploymentPool(configs, routing=routing, failure_threshold=2, cooldown_seconds=1,
+                              max_retries=args.max_retries, deadline_seconds=10)
+
+        failures = []
+
+        def lookup(question):
+            started = time.perf_counter()
+            try:
+                match_faq_id(question, pool)
+            except Exception as e:
+                failures.append(type(e).__name__)
+            return time.perf_counter() - started
+
+        half = len(questions) // 2
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as workers:
+            list(workers.map(lookup, questions[:half]))
+            stubs["fast"].stop()
+            after_stop = list(workers.map(lookup, questions[half:]))
+        elapsed = time.perf_counter() - started
+
+        print(f"\nrouting={routing}: {len(questions) - len(failures)}/{len(questions)} answered in {elapsed:.1f}s "
+              f"(fast endpoint stopped after {half})")
+        print(f"after the stop: p50 {statistics.median(after_stop) * 1000:.0f} ms, "
+              f"p95 {percentile(after_stop, 95) * 1000:.0f} ms, max {max(after_stop) * 1000:.0f} ms")
+        print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'ewma ms':>8} {'healthy':>8}")
+        for name, stats in pool.stats()["endpoints"].items():
+            latency = stats["latency_ewma_ms"]
+            print(f"{name:<10} {stats['requests']:>9} {stats['errors']:>7} "
+                  f"{latency if latency is not None else '-':>8} {str(stats['healthy']):>8}")
+
+        for name, stub in stubs.items():
+            if name != "fast":
+                stub.stop()
+
+
+if __name__ == "__main__":
+    main()
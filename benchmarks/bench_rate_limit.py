@@ -0,0 +1,252 @@
+"""
+Burst of FAQ lookups against a quota-enforcing stub, with and without RateLimitedClient.
+
+The stub allows --quota-requests calls per --quota-window seconds and fails
+--error-rate of calls with a 503. The plain client turns every 429/503 into
+an error reply; the wrapper paces and retries instead.
+
+Before the burst, RateLimitedClient is checked against small stubs:
+Retry-After is waited out, calls that can't finish in time give up before
+their deadline, x-ratelimit-remaining-* headers pull the buckets down,
+backoff jitter stays within its bounds and 503s are retried through. The
+script exits with status 1 if any check failed.
+
+    python -m benchmarks.bench_rate_limit --questions 40 --concurrency 16
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import APIStatusError, AzureOpenAI
+
+from azure_client import DeadlineExceeded, RateLimitedClient
+from benchmarks.stub_azure_server import StubAzureServer
+from evaluation.harness import percentile
+from faq_data import faqs
+from token_budget import usage_recorder
+from utils import match_faq_id
+
+
+def run_burst(client, questions: list, concurrency: int) -> tuple:
+    latencies, failures = [], []
+
+    def lookup(question):
+        started = time.perf_counter()
+        try:
+            match_faq_id(question, client)
+        except Exception as e:
+            failures.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lookup, questions))
+    return time.perf_counter() - started, latencies, failures
+
+
+def stub_client(stub: StubAzureServer, **kwargs) -> RateLimitedClient:
+    azure = AzureOpenAI(api_key="stub", api_version="2023-12-01-preview", azure_endpoint=stub.url,
+                        max_retries=0)
+    return RateLimitedClient(azure, **kwargs)
+
+
+def check_retry_after() -> list:
+    """
+    A 429 is retried once, after the Retry-After the stub asked for, not earlier
+    """
+    window = 1.5
+    stub = StubAzureServer(base_ms=5, completion_token_ms=0, requests_limit=1, quota_window_s=window).start()
+    client = stub_client(stub, max_retries=5, backoff_base=0.01, deadline_seconds=10)
+    try:
+        started = time.perf_counter()
+        match_faq_id(faqs[0]["question"], client)
+        match_faq_id(faqs[1]["question"], client)
+        elapsed = time.perf_counter() - started
+    finally:
+        stub.stop()
+
+    failures = []
+    if stub.status_counts[429] != 1:
+        failures.append(f"expected one 429, the stub sent {stub.status_counts[429]}")
+    if elapsed < window:
+        failures.append(f"retried after {elapsed:.2f}s, before the {window}s quota window reopened")
+    if client.stats()["throttled"] != 1:
+        failures.append(f"client counted {client.stats()['throttled']} throttled calls, expected 1")
+    return failures
+
+
+def check_deadline() -> list:
+    """
+    Calls whose Retry-After or pacing wait runs past the deadline fail at once
+    """
+    failures = []
+    stub = StubAzureServer(base_ms=5, completion_token_ms=0, requests_limit=1, quota_window_s=10).start()
+    client = stub_client(stub, max_retries=5, deadline_seconds=1)
+    try:
+        match_faq_id(faqs[0]["question"], client)
+        started = time.perf_counter()
+        try:
+            match_faq_id(faqs[1]["question"], client)
+            failures.append("a call past its deadline succeeded")
+        except APIStatusError as e:
+            if e.status_code != 429:
+                failures.append(f"expected the 429 to be raised, got {e.status_code}")
+        elapsed = time.perf_counter() - started
+        if elapsed > 1:
+            failures.append(f"gave up on a 10s Retry-After after {elapsed:.2f}s, past the 1s deadline")
+    finally:
+        stub.stop()
+
+    # Six requests a minute leaves a single call in the bucket; the next would wait 10s
+    stub = StubAzureServer(base_ms=5, completion_token_ms=0).start()
+    client = stub_client(stub, requests_per_minute=6, burst_seconds=1, deadline_seconds=1)
+    try:
+        match_faq_id(faqs[0]["question"], client)
+        started = time.perf_counter()
+        try:
+            match_faq_id(faqs[1]["question"], client)
+            failures.append("a call that could not be paced within its deadline went through")
+        except DeadlineExceeded:
+            pass
+        elapsed = time.perf_counter() - started
+        if elapsed > 0.5:
+            failures.append(f"pacing gave up after {elapsed:.2f}s instead of at once")
+        if stub.request_count != 1:
+            failures.append(f"the stub saw {stub.request_count} calls, expected 1")
+    finally:
+        stub.stop()
+    return failures
+
+
+def check_header_clamping() -> list:
+    """
+    The buckets never hold more than the x-ratelimit-remaining-* headers report
+    """
+    requests_limit, tokens_limit = 5, 200000
+    stub = StubAzureServer(base_ms=5, completion_token_ms=0, requests_limit=requests_limit,
+                           tokens_limit=tokens_limit).start()
+    client = stub_client(stub, requests_per_minute=600, tokens_per_minute=10 ** 7)
+    failures = []
+    try:
+        for i in range(3):
+            match_faq_id(faqs[i]["question"], client)
+            if client.requests.level > requests_limit - (i + 1):
+                failures.append(f"request bucket at {client.requests.level:.1f} after {i + 1} calls, "
+                                f"the stub has {requests_limit - (i + 1)} left")
+            if client.tokens.level >= tokens_limit:
+                failures.append(f"token bucket at {client.tokens.level:.0f}, not clamped below {tokens_limit}")
+    finally:
+        stub.stop()
+    return failures
+
+
+def check_jitter() -> list:
+    """
+    Backoff is full jitter up to min(backoff_max, base * 2^attempt), but never shorter than Retry-After
+    """
+    client = RateLimitedClient(None, backoff_base=0.5, backoff_max=4)
+    failures = []
+    for attempt in range(8):
+        bound = min(client.backoff_max, client.backoff_base * 2 ** attempt)
+        delays = [client._backoff(attempt, {}) for _ in range(500)]
+        if min(delays) < 0 or max(delays) > bound:
+            failures.append(f"attempt {attempt}: delays {min(delays):.3f}-{max(delays):.3f}s outside 0-{bound}s")
+        if max(delays) < 0.8 * bound or min(delays) > 0.2 * bound:
+            failures.append(f"attempt {attempt}: delays {min(delays):.3f}-{max(delays):.3f}s don't spread "
+                            f"over 0-{bound}s")
+    for headers, wait in (({"retry-after-ms": "2500"}, 2.5), ({"retry-after": "3"}, 3.0)):
+        delays = [client._backoff(0, headers) for _ in range(100)]
+        if min(delays) < wait:
+            failures.append(f"backoff of {min(delays):.3f}s with {headers} is shorter than {wait}s")
+    return failures
+
+
+def check_server_errors() -> list:
+    """
+    With half the calls failing with a 503, every lookup still succeeds through retries
+    """
+    stub = StubAzureServer(base_ms=5, completion_token_ms=0, error_rate=0.5).start()
+    client = stub_client(stub, max_retries=20, backoff_base=0.01, backoff_max=0.05)
+    failures = []
+    try:
+        for i in range(20):
+            try:
+                match_faq_id(faqs[i % len(faqs)]["question"], client)
+            except Exception as e:
+                failures.append(f"lookup {i} failed: {type(e).__name__}")
+    finally:
+        stub.stop()
+    if not stub.status_counts[503]:
+        failures.append("the stub sent no 503s")
+    if client.stats()["server_errors"] != stub.status_counts[503]:
+        failures.append(f"client counted {client.stats()['server_errors']} server errors, "
+                        f"the stub sent {stub.status_counts[503]}")
+    return failures
+
+
+CHECKS = [check_retry_after, check_deadline, check_header_clamping, check_jitter, check_server_errors]
+
+
+def run_checks() -> int:
+    """
+    Run every check, printing its failures. Returns the number of failed checks
+    """
+    failed = 0
+    for check in CHECKS:
+        try:
+            failures = check()
+        except Exception as e:
+            failures = [f"raised {type(e).__name__}: {e}"]
+        print(f"{check.__name__:<24} {'ok' if not failures else 'FAILED'}")
+        for failure in failures:
+            print(f"  {failure}")
+        failed += bool(failures)
+    return failed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--quota-requests", type=int, default=10)
+    parser.add_argument("--quota-window", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--deadline", type=float, default=30)
+    args = parser.parse_args()
+
+    # Stub calls should not end up in the real token usage log
+    usage_recorder.log_path = None
+
+    failed_checks = run_checks()
+    print()
+
+    questions = [faqs[i % len(faqs)]["question"] for i in range(args.questions)]
+    print(f"{'client':<14} {'ok':>4} {'failed':>7} {'secs':>6} {'p50 ms':>8} {'p95 ms':>8} {'stub 429s':>10}")
+
+    for name in ("plain", "rate-limited"):
+        # A fresh stub per run so both start with a full quota
+        stub = StubAzureServer(base_ms=20, completion_token_ms=0, requests_limit=args.quota_requests,
+                               quota_window_s=args.quota_window, error_rate=args.error_rate).start()
+        azure = AzureOpenAI(api_key="stub", api_version="2023-12-01-preview", azure_endpoint=stub.url,
+                            max_retries=0)
+        client = azure
+        if name == "rate-limited":
+            client = RateLimitedClient(azure, requests_per_minute=args.quota_requests * 60 / args.quota_window,
+                                       deadline_seconds=args.deadline, burst_seconds=args.quota_window)
+
+        elapsed, latencies, failures = run_burst(client, questions, args.concurrency)
+        print(f"{name:<14} {len(questions) - len(failures):>4} {len(failures):>7} {elapsed:>6.1f} "
+              f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+              f"{stub.status_counts[429]:>10}")
+        if isinstance(client, RateLimitedClient):
+            print(f"  {client.stats()}")
+        stub.stop()
+
+    return 1 if failed_checks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
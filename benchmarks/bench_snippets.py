@@ -0,0 +1,83 @@
+"""
+First-paragraphs extraction against relevance-ranked snippets on fixture ACS pages.
+
+Every labeled question is answered from the three pages in
+benchmarks/fixtures, the way the lite-search fallback combines its top
+three results. The old extractor takes the first three paragraphs over 40
+characters of each page; the new one ranks all paragraphs of all pages
+against the question with BM25 and keeps the best under --char-budget.
+Reports response size, extraction time and how often the text contains a
+passage from the FAQ answer the question is about.
+
+    python -m benchmarks.bench_snippets --char-budget 800
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from evaluation.harness import percentile
+from evaluation.labeled_questions import labeled_questions
+from faq_data import faqs
+from snippets import WEB_SNIPPET_CHAR_BUDGET, page_passages, select_passages
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def first_paragraphs(page_html: str, max_paragraphs: int = 3) -> list:
+    """
+    The extraction the lite-search fallback used to do
+    """
+    paragraphs = []
+    for p in BeautifulSoup(page_html, "html.parser").find_all("p"):
+        text = p.get_text(strip=True)
+        if len(text) > 40:
+            paragraphs.append(text)
+        if len(paragraphs) >= max_paragraphs:
+            break
+    return paragraphs
+
+
+def ranked_passages(question: str, pages: list, char_budget: int) -> list:
+    selected = select_passages(question, [page_passages(page) for page in pages], char_budget)
+    return [passage for page in selected for passage in page]
+
+
+def contains_answer(passages: list, faq_id: int) -> bool:
+    answer = " ".join(faqs[faq_id - 1]["answer"].split())
+    return any(passage.rstrip(".") in answer for passage in passages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--char-budget", type=int, default=WEB_SNIPPET_CHAR_BUDGET)
+    args = parser.parse_args()
+
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("acs_page_*.html"))]
+    questions = [(item["question"], item["faq_id"]) for item in labeled_questions if item["faq_id"]]
+    print(f"{len(pages)} fixture pages ({sum(len(page) for page in pages)} bytes of HTML), "
+          f"{len(questions)} questions")
+
+    extractors = {
+        "first-3-paragraphs": lambda question: [p for page in pages for p in first_paragraphs(page)],
+        "ranked": lambda question: ranked_passages(question, pages, args.char_budget),
+    }
+
+    print(f"{'extractor':<20} {'mean bytes':>11} {'max bytes':>10} {'p50 ms':>7} {'p95 ms':>7} {'has answer':>11}")
+    for name, extract in extractors.items():
+        sizes, latencies, hits = [], [], 0
+        for question, faq_id in questions:
+            started = time.perf_counter()
+            passages = extract(question)
+            latencies.append((time.perf_counter() - started) * 1000)
+            sizes.append(len("\n\n".join(passages).encode("utf-8")))
+            hits += contains_answer(passages, faq_id)
+        print(f"{name:<20} {statistics.mean(sizes):>11.0f} {max(sizes):>10} {percentile(latencies, 50):>7.1f} "
+              f"{percentile(latencies, 95):>7.1f} {hits / len(questions):>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
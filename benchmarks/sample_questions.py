@@ -0,0 +1,61 @@
+# Held-out questions for bench_normalize, worded independently of evaluation/labeled_questions.py
+# and of the synonym map in normalize.py. faq_id is the 1-based FAQ that answers it, None for no match
+
+sample_questions = [
+    {"question": "What is going to happen now that OSI is looking into me?", "faq_id": 1},
+    {"question": "What does an OSI investigation of a foster parent involve?", "faq_id": 1},
+    {"question": "Do I get advance notice before OSI shows up at my home?", "faq_id": 2},
+    {"question": "Is the OSI home visit announced ahead of time?", "faq_id": 2},
+    {"question": "Can a friend or relative sit with me during the OSI visit?", "faq_id": 3},
+    {"question": "Am I allowed a support person when OSI comes to my home?", "faq_id": 3},
+    {"question": "Might the agency take my foster child away while OSI is still investigating?", "faq_id": 4},
+    {"question": "Is my foster child removed from my home as soon as an investigation starts?", "faq_id": 4},
+    {"question": "Could my biological children also be taken because of the OSI case about my foster child?", "faq_id": 5},
+    {"question": "Are my own children affected by an investigation involving my foster child?", "faq_id": 5},
+    {"question": "Will my case planner still talk to me about the allegations during the investigation?", "faq_id": 6},
+    {"question": "Can I discuss the pending allegations with the foster care agency?", "faq_id": 6},
+    {"question": "Who do I phone at OSI to find out where my investigation stands?", "faq_id": 7},
+    {"question": "Is there a way to check on the progress of my OSI investigation?", "faq_id": 7},
+    {"question": "Can new foster children be placed in my home during a pending OSI case?", "faq_id": 8},
+    {"question": "Are foster placements put on hold while I am under investigation?", "faq_id": 8},
+    {"question": "What does it mean when the SCR report is indicated or unfounded?", "faq_id": 9},
+    {"question": "How does OSI decide whether the allegations are substantiated?", "faq_id": 9},
+    {"question": "Can I challenge an indicated OSI finding?", "faq_id": 10},
+    {"question": "How do I appeal after OSI indicated the case against me?", "faq_id": 10},
+    {"question": "Once I finish the corrective action plan, am I still allowed to foster?", "faq_id": 11},
+    {"question": "Does completing a corrective action plan let me remain a foster parent?", "faq_id": 11},
+    {"question": "Is the agency allowed to close my foster home after the investigation?", "faq_id": 12},
+    {"question": "Why might my foster home be closed even though the allegations were unfounded?", "faq_id": 12},
+    {"question": "Somebody reported me to the SCR and it was not true. What are my options?", "faq_id": 13},
+    {"question": "What should I do about a false report to the SCR?", "faq_id": 13},
+    {"question": "Why does an unfounded report still appear when my SCR clearance is checked?", "faq_id": 14},
+    {"question": "My SCR clearance still lists a case that was unfounded, why?", "faq_id": 14},
+    {"question": "How do juvenile delinquents, juvenile offenders and adolescent offenders differ?", "faq_id": 15},
+    {"question": "Is a juvenile offender treated differently from a juvenile delinquent?", "faq_id": 15},
+    {"question": "Where will the police take my child after an arrest?", "faq_id": 16},
+    {"question": "After my child was arrested, is he brought to Family Court or Criminal Court?", "faq_id": 16},
+    {"question": "What are the next steps in the juvenile delinquent process after an arrest?", "faq_id": 17},
+    {"question": "What happens in court after my child is arrested as a juvenile delinquent?", "faq_id": 17},
+    {"question": "Will the court give my child a lawyer for free?", "faq_id": 18},
+    {"question": "Is my child entitled to a lawyer in Family Court?", "faq_id": 18},
+    {"question": "Can my child stay at home until the court case is finished?", "faq_id": 19},
+    {"question": "Will my child be kept in detention while the case is pending?", "faq_id": 19},
+    {"question": "What takes place at a fact-finding hearing in Family Court?", "faq_id": 20},
+    {"question": "How does the fact-finding stage of a juvenile case work?", "faq_id": 20},
+    {"question": "What does the judge decide at the dispositional hearing?", "faq_id": 21},
+    {"question": "What can the court order at disposition for my child?", "faq_id": 21},
+    {"question": "What rules must my child follow while on probation?", "faq_id": 22},
+    {"question": "What will a community-based program expect from my child?", "faq_id": 22},
+    {"question": "How do I start the adoption process in New York?", "faq_id": None},
+    {"question": "Can my mother get custody of my children?", "faq_id": None},
+    {"question": "Does the father have to pay child support?", "faq_id": None},
+    {"question": "How do I file a patent for an invention?", "faq_id": None},
+    {"question": "Is there a charge for a copy of my marriage certificate?", "faq_id": None},
+    {"question": "How do I sign up for Medicaid?", "faq_id": None},
+    {"question": "Where can I find a food pantry near me?", "faq_id": None},
+    {"question": "What time does the subway stop running?", "faq_id": None},
+    {"question": "How do I get a replacement driver license?", "faq_id": None},
+    {"question": "How can I apply for public housing?", "faq_id": None},
+    {"question": "Where do I vote in the next election?", "faq_id": None},
+    {"question": "How do I enroll my child in pre-K?", "faq_id": None},
+]
@@ -0,0 +1,252 @@
+"""
+Local stand-in for the Azure OpenAI chat completions endpoint.
+
+It answers the FAQ prompts built in utils.py / batching.py with a simple
+word-overlap match against faq_data.faqs and sleeps for a latency that grows
+with the prompt and completion size, so benchmarks can run offline.
+
+Run on its own with:
+
+    python -m benchmarks.stub_azure_server --port 8081
+"""
+
+import argparse
+import json
+import re
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from faq_data import faqs
+from retrieval import tokenize
+from token_budget import estimate_tokens
+from utils import FAQ_NO_MATCH_ANSWER
+
+def _keywords(text: str) -> set:
+    return set(tokenize(text))
+
+
+FAQ_KEYWORDS = [_keywords(faq["question"]) for faq in faqs]
+
+
+def best_faq_match(question: str) -> tuple:
+    """
+    (index, score) of the FAQ whose question shares the most keywords with the question
+    """
+    words = _keywords(question)
+    if not words:
+        return None, 0.0
+
+    best_index, best_score = None, 0.0
+    for i, faq_words in enumerate(FAQ_KEYWORDS):
+        if not faq_words:
+            continue
+        score = len(words & faq_words) / len(words | faq_words)
+        if score > best_score:
+            best_index, best_score = i, score
+
+    return best_index, best_score
+
+
+def best_faq_index(question: str, threshold: float = 0.3):
+    """
+    Index of the best matching FAQ, or None when the overlap is below threshold
+    """
+    index, score = best_faq_match(question)
+    return index if score >= threshold else None
+
+
+class StubAzureServer:
+    """
+    Threaded HTTP server speaking enough of the Azure OpenAI API for the chatbot.
+
+    Latency per call is base_ms + prompt tokens * prompt_token_ms +
+    completion tokens * completion_token_ms. max_concurrency limits how many
+    completions are "generated" at once to mimic deployment capacity.
+
+    Like an Azure deployment, it can enforce a request and token quota per
+    quota_window_s (tokens counted as prompt + max_tokens), answering 429 with
+    Retry-After when exceeded and reporting x-ratelimit-remaining-* headers.
+    error_rate makes that share of calls fail with a 503.
+    """
+
+    def __init__(self, port: int = 0, base_ms: float = 150, prompt_token_ms: float = 0.02,
+                 completion_token_ms: float = 15, max_concurrency: int = 8, requests_limit: int = 0,
+                 tokens_limit: int = 0, quota_window_s: float = 60, error_rate: float = 0.0):
+        self.base_ms = base_ms
+        self.prompt_token_ms = prompt_token_ms
+        self.completion_token_ms = completion_token_ms
+        self.requests_limit = requests_limit
+        self.tokens_limit = tokens_limit
+        self.quota_window_s = quota_window_s
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.status_counts = Counter()
+        self._window = deque()
+        self._capacity = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def handle(self, body: dict) -> tuple:
+        """
+        (status, headers, payload) for a chat completions request
+        """
+        messages = body.get("messages", [])
+        max_tokens = body.get("max_tokens") or 500
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        cost = estimate_tokens(prompt) + max_tokens
+
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] >= self.quota_window_s:
+                self._window.popleft()
+            used_requests = len(self._window)
+            used_tokens = sum(tokens for _, tokens in self._window)
+            over_requests = self.requests_limit and used_requests + 1 > self.requests_limit
+            over_tokens = self.tokens_limit and used_tokens + cost > self.tokens_limit
+            if over_requests or over_tokens:
+                retry_after = self.quota_window_s - (now - self._window[0][0]) if self._window else self.quota_window_s
+                self.status_counts[429] += 1
+                headers = {
+                    "Retry-After": str(math.ceil(retry_after)),
+                    "retry-after-ms": str(int(retry_after * 1000)),
+                }
+                return 429, headers, {"error": {"code": "429", "message": "Rate limit is exceeded. Try again later."}}
+            self._window.append((now, cost))
+            headers = {}
+            if self.requests_limit:
+                headers["x-ratelimit-remaining-requests"] = str(self.requests_limit - used_requests - 1)
+            if self.tokens_limit:
+                headers["x-ratelimit-remaining-tokens"] = str(self.tokens_limit - used_tokens - cost)
+
+        if self.error_rate and random.random() < self.error_rate:
+            with self._lock:
+                self.status_counts[503] += 1
+            return 503, {}, {"error": {"code": "503", "message": "Service unavailable"}}
+
+        payload = self.complete(messages, max_tokens)
+        with self._lock:
+            self.status_counts[200] += 1
+        return 200, headers, payload
+
+    def complete(self, messages: list, max_tokens: int) -> dict:
+        """
+        Build the completion for a chat request and wait for its simulated latency
+        """
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        content = self._reply_for(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = min(estimate_tokens(content), max_tokens)
+
+        with self._lock:
+            self.request_count += 1
+
+        with self._capacity:
+            delay_ms = (self.base_ms + prompt_tokens * self.prompt_token_ms
+                        + completion_tokens * self.completion_token_ms)
+            time.sleep(delay_ms / 1000.0)
+
+        return {
+            "id": f"chatcmpl-stub-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _reply_for(self, prompt: str) -> str:
+        if "User Questions:" in prompt:
+            block = prompt.split("User Questions:", 1)[1].split("Instructions:", 1)[0]
+            matches = []
+            for number, question in re.findall(r"^(\d+)\. (.*)$", block, re.MULTILINE):
+                question = json.loads(question)
+                matches.append({"question": int(number), **self._structured_match(question)})
+            return json.dumps({"matches": matches})
+
+        question_match = re.search(r"User Question: (.*)", prompt)
+        question = question_match.group(1) if question_match else ""
+        if "Respond with JSON only" in prompt:
+            return json.dumps(self._structured_match(question))
+
+        index = best_faq_index(question)
+        return FAQ_NO_MATCH_ANSWER if index is None else faqs[index]["answer"]
+
+    def _structured_match(self, question: str) -> dict:
+        index = best_faq_index(question)
+        confidence = round(min(1.0, 0.5 + best_faq_match(question)[1]), 2)
+        return {"faq_id": "none" if index is None else index + 1, "confidence": confidence}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                if "/chat/completions" not in self.path:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, headers, payload = server.handle(body)
+                payload = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stub Azure OpenAI server")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--base-ms", type=float, default=150)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=0, help="Requests allowed per minute, 0 for no quota")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens allowed per minute, 0 for no quota")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubAzureServer(port=args.port, base_ms=args.base_ms, max_concurrency=args.max_concurrency,
+                           requests_limit=args.rpm, tokens_limit=args.tpm, error_rate=args.error_rate)
+    print(f"Stub Azure OpenAI listening on {stub.url}")
+    stub.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
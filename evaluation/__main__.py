@@ -0,0 +1,74 @@
+"""
+Offline evaluation of FAQ matching strategies.
+
+Runs each matcher over the labeled questions and prints precision/recall@k,
+no-match accuracy and latency in one table. The LLM matchers talk to the
+local stub Azure server, so nothing leaves the machine. Pass thresholds to
+use it as a regression gate; the exit code is 1 when any is missed.
+
+    python -m evaluation --matchers lexical,vector,hybrid --min-recall 0.8
+"""
+
+import argparse
+import sys
+
+from openai import AzureOpenAI
+
+from benchmarks.stub_azure_server import StubAzureServer
+from evaluation.harness import check_gates, evaluate, format_report
+from evaluation.labeled_questions import labeled_questions
+from evaluation.matchers import LLMMatcher, RetrievalMatcher
+from token_budget import usage_recorder
+
+DEFAULT_MIN_SCORES = {"lexical": 0.35, "vector": 0.2, "hybrid": 0.28}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matchers", default="llm-stub,llm-stub-structured,lexical,vector,hybrid")
+    parser.add_argument("--k", default="1,3", help="Comma separated cut-offs for precision/recall")
+    parser.add_argument("--stub-latency-ms", type=float, default=5, help="Base latency of the stub Azure server")
+    parser.add_argument("--min-recall", type=float, help="Fail if any matcher's recall@1 is lower")
+    parser.add_argument("--min-no-match-accuracy", type=float, help="Fail if any matcher's no-match accuracy is lower")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any matcher's p95 latency is higher")
+    args = parser.parse_args(argv)
+
+    ks = tuple(int(k) for k in args.k.split(","))
+    names = [name.strip() for name in args.matchers.split(",") if name.strip()]
+
+    # Stub calls should not end up in the real token usage log
+    usage_recorder.log_path = None
+
+    stub = None
+    if any(name.startswith("llm-stub") for name in names):
+        stub = StubAzureServer(base_ms=args.stub_latency_ms, prompt_token_ms=0, completion_token_ms=0).start()
+        client = AzureOpenAI(api_key="stub", api_version="2023-12-01-preview", azure_endpoint=stub.url,
+                             max_retries=0)
+
+    matchers = {}
+    for name in names:
+        if name == "llm-stub":
+            matchers[name] = LLMMatcher(client, structured=False)
+        elif name == "llm-stub-structured":
+            matchers[name] = LLMMatcher(client, structured=True)
+        elif name in DEFAULT_MIN_SCORES:
+            matchers[name] = RetrievalMatcher(name, DEFAULT_MIN_SCORES[name])
+        else:
+            parser.error(f"Unknown matcher: {name}")
+
+    try:
+        results = {name: evaluate(matcher, labeled_questions, ks) for name, matcher in matchers.items()}
+    finally:
+        if stub:
+            stub.stop()
+
+    print(format_report(results, ks))
+
+    failures = check_gates(results, args.min_recall, args.min_no_match_accuracy, args.max_p95_ms)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
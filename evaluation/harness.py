@@ -0,0 +1,90 @@
+import statistics
+import time
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def evaluate(matcher, labeled: list, ks: tuple = (1, 3)) -> dict:
+    """
+    Run a matcher over the labeled questions and compute its metrics.
+
+    precision@k and recall@k are averaged over questions that have an FAQ
+    label; each has exactly one relevant FAQ, so precision@k is 1/len(results)
+    when it appears in the top k. no_match_accuracy is the share of unlabeled
+    questions for which the matcher returned nothing, and false_match_rate the
+    share of labeled questions matched to a wrong FAQ at rank 1.
+    """
+    hits = {k: 0 for k in ks}
+    precision = {k: 0.0 for k in ks}
+    latencies = []
+    answerable = no_match_total = no_match_correct = wrong_top = 0
+
+    for item in labeled:
+        started = time.perf_counter()
+        results = matcher(item["question"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        ranked_ids = [faq_id for faq_id, _ in results]
+
+        if item["faq_id"] is None:
+            no_match_total += 1
+            if not ranked_ids:
+                no_match_correct += 1
+            continue
+
+        answerable += 1
+        if ranked_ids and ranked_ids[0] != item["faq_id"]:
+            wrong_top += 1
+        for k in ks:
+            top = ranked_ids[:k]
+            if item["faq_id"] in top:
+                hits[k] += 1
+                precision[k] += 1.0 / len(top)
+
+    metrics = {
+        "queries": len(labeled),
+        "no_match_accuracy": no_match_correct / no_match_total if no_match_total else 1.0,
+        "false_match_rate": wrong_top / answerable if answerable else 0.0,
+        "latency_p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "latency_p95_ms": percentile(latencies, 95) if latencies else 0.0,
+        "latency_max_ms": max(latencies) if latencies else 0.0,
+    }
+    for k in ks:
+        metrics[f"recall@{k}"] = hits[k] / answerable if answerable else 0.0
+        metrics[f"precision@{k}"] = precision[k] / answerable if answerable else 0.0
+    return metrics
+
+
+def format_report(results: dict, ks: tuple = (1, 3)) -> str:
+    """
+    One row per matcher: retrieval quality next to its latency distribution
+    """
+    columns = [f"{name}@{k}" for k in ks for name in ("precision", "recall")]
+    columns += ["no_match_accuracy", "false_match_rate", "latency_p50_ms", "latency_p95_ms", "latency_max_ms"]
+    headers = [c.replace("precision", "prec").replace("_accuracy", "_acc").replace("_rate", "")
+               .replace("latency_", "") for c in columns]
+
+    lines = [f"{'matcher':<22}" + "".join(f"{header:>13}" for header in headers)]
+    for name, metrics in results.items():
+        cells = [f"{metrics[c]:>13.1f}" if c.startswith("latency") else f"{metrics[c]:>13.3f}" for c in columns]
+        lines.append(f"{name:<22}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def check_gates(results: dict, min_recall: float = None, min_no_match_accuracy: float = None,
+                max_p95_ms: float = None) -> list:
+    """
+    Failures of the regression thresholds (recall@1, no-match accuracy, p95 latency), one message each
+    """
+    failures = []
+    for name, metrics in results.items():
+        if min_recall is not None and metrics["recall@1"] < min_recall:
+            failures.append(f"{name}: recall@1 {metrics['recall@1']:.3f} < {min_recall}")
+        if min_no_match_accuracy is not None and metrics["no_match_accuracy"] < min_no_match_accuracy:
+            failures.append(f"{name}: no_match_accuracy {metrics['no_match_accuracy']:.3f} < {min_no_match_accuracy}")
+        if max_p95_ms is not None and metrics["latency_p95_ms"] > max_p95_ms:
+            failures.append(f"{name}: p95 latency {metrics['latency_p95_ms']:.1f}ms > {max_p95_ms}ms")
+    return failures
@@ -0,0 +1,64 @@
+# Paraphrased user questions labeled with the 1-based ID of the faq_data.faqs
+# entry that answers them, or None when no FAQ applies and the chatbot should
+# fall back to the web.
+
+labeled_questions = [
+    {"question": "What happens to me during an OSI investigation?", "faq_id": 1},
+    {"question": "I'm being investigated by the Office of Special Investigations, what should I expect?", "faq_id": 1},
+    {"question": "Does the foster care agency warn me before OSI starts investigating?", "faq_id": 2},
+    {"question": "Will I be told ahead of time that OSI is going to investigate me?", "faq_id": 2},
+    {"question": "Can I bring a support person to my OSI interview?", "faq_id": 3},
+    {"question": "Is someone allowed to be with me for support while OSI investigates?", "faq_id": 3},
+    {"question": "Could my foster child be taken out of my home before the investigation is finished?", "faq_id": 4},
+    {"question": "Will OSI remove my foster kid while the investigation is still going on?", "faq_id": 4},
+    {"question": "Can my own children be removed because of an investigation about my foster child?", "faq_id": 5},
+    {"question": "Are my biological kids at risk of removal from an OSI investigation of my foster child?", "faq_id": 5},
+    {"question": "Can the agency talk to me about the allegations once the OSI investigation has started?", "faq_id": 6},
+    {"question": "Is my foster care agency allowed to discuss case work with me during a pending investigation?", "faq_id": 6},
+    {"question": "Can I call OSI to check the status of my investigation?", "faq_id": 7},
+    {"question": "How do I get an update on the investigation status from OSI?", "faq_id": 7},
+    {"question": "Can more foster children be placed with me while the OSI investigation is pending?", "faq_id": 8},
+    {"question": "Will I get additional foster placements during an open OSI investigation?", "faq_id": 8},
+    {"question": "What happens once OSI indicates or unfounds the allegations in the SCR report?", "faq_id": 9},
+    {"question": "What comes next after OSI staff decide on the allegations against me?", "faq_id": 9},
+    {"question": "What are my options if the OSI investigation is indicated against me?", "faq_id": 10},
+    {"question": "The OSI case was indicated against me, what can I do?", "faq_id": 10},
+    {"question": "Can I keep being a foster parent after completing my Corrective Action Plan?", "faq_id": 11},
+    {"question": "If my case was indicated but I finished the corrective action plan, can I still foster?", "faq_id": 11},
+    {"question": "Can the agency close my foster home even if the case was unfounded?", "faq_id": 12},
+    {"question": "Why would the foster care agency close my home after an indicated case?", "faq_id": 12},
+    {"question": "Someone made a false allegation against me to the SCR, what can I do?", "faq_id": 13},
+    {"question": "How do I respond to a false report made about me to the State Central Register?", "faq_id": 13},
+    {"question": "Why does my unfounded OSI case still show up on my SCR clearance?", "faq_id": 14},
+    {"question": "My case was unfounded but it still comes up on the SCR clearance check", "faq_id": 14},
+    {"question": "What's the difference between a juvenile delinquent and a juvenile offender?", "faq_id": 15},
+    {"question": "How is an adolescent offender different from a juvenile delinquent?", "faq_id": 15},
+    {"question": "Where is my child taken after being arrested?", "faq_id": 16},
+    {"question": "My son was arrested, where will he go?", "faq_id": 16},
+    {"question": "What happens next after my child is arrested as a juvenile delinquent?", "faq_id": 17},
+    {"question": "My daughter was arrested as a juvenile delinquent, what is the process now?", "faq_id": 17},
+    {"question": "Does my child need to have a lawyer?", "faq_id": 18},
+    {"question": "Will my kid need a lawyer in court?", "faq_id": 18},
+    {"question": "Can my child come home while the court case is pending?", "faq_id": 19},
+    {"question": "Does my son get to come home before his court case is over?", "faq_id": 19},
+    {"question": "What is a fact-finding hearing?", "faq_id": 20},
+    {"question": "What happens at a fact finding trial?", "faq_id": 20},
+    {"question": "What happens at the dispositional hearing?", "faq_id": 21},
+    {"question": "What happens at my child's sentencing?", "faq_id": 21},
+    {"question": "What will be expected of my child under Probation supervision?", "faq_id": 22},
+    {"question": "What rules does my child have to follow in a community-based program?", "faq_id": 22},
+    {"question": "How do I renew my passport?", "faq_id": None},
+    {"question": "What is the weather in New York tomorrow?", "faq_id": None},
+    {"question": "How do I apply for SNAP food benefits?", "faq_id": None},
+    {"question": "Where can I pay a parking ticket in NYC?", "faq_id": None},
+    {"question": "How do I become a foster parent in New York City?", "faq_id": None},
+    {"question": "What are the requirements to adopt a child?", "faq_id": None},
+    {"question": "How do I apply for child care vouchers?", "faq_id": None},
+    {"question": "What is the phone number for 311?", "faq_id": None},
+    {"question": "How do I report child abuse?", "faq_id": None},
+    {"question": "Can I get help paying rent?", "faq_id": None},
+    {"question": "What are the public school enrollment deadlines?", "faq_id": None},
+    {"question": "How do I file for child support?", "faq_id": None},
+    {"question": "When are ACS offices open?", "faq_id": None},
+    {"question": "How do I get a copy of my birth certificate?", "faq_id": None},
+]
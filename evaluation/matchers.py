@@ -0,0 +1,52 @@
+from openai import AzureOpenAI
+
+from faq_data import faqs
+from retrieval import get_faq_index
+from utils import FAQ_MATCH_MIN_CONFIDENCE, get_best_faq_answer, match_faq_id
+
+# A matcher is any callable taking a question and returning a ranked list of
+# (faq_id, score) pairs, best first. An empty list means "no match".
+
+
+class RetrievalMatcher:
+    """
+    Local lexical, vector or hybrid matching through retrieval.FAQIndex
+    """
+
+    def __init__(self, method: str, min_score: float, k: int = 5):
+        self.method = method
+        self.min_score = min_score
+        self.k = k
+
+    def __call__(self, question: str) -> list:
+        results = get_faq_index().search(question, k=self.k, method=self.method)
+        # The top score decides between "match" and "no match", like the LLM's single answer
+        if not results or results[0][1] < self.min_score:
+            return []
+        return results
+
+
+class LLMMatcher:
+    """
+    The production Azure prompts, pointed at whatever endpoint the client uses.
+
+    structured=True uses the FAQ-ID prompt; otherwise the answer-writing prompt
+    is used and the reply is mapped back to the FAQ whose answer it reproduces.
+    """
+
+    def __init__(self, client: AzureOpenAI, structured: bool = True):
+        self.client = client
+        self.structured = structured
+
+    def __call__(self, question: str) -> list:
+        if self.structured:
+            faq_id, confidence = match_faq_id(question, self.client)
+            if faq_id is None or (confidence is not None and confidence < FAQ_MATCH_MIN_CONFIDENCE):
+                return []
+            return [(faq_id, confidence if confidence is not None else 1.0)]
+
+        answer = get_best_faq_answer(question, self.client)
+        for faq_id, faq in enumerate(faqs, 1):
+            if answer[:100] and faq["answer"].startswith(answer[:100]):
+                return [(faq_id, 1.0)]
+        return []
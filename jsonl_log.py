@@ -0,0 +1,29 @@
+import json
+import os
+
+
+def rotated_path(path: str) -> str:
+    return path + ".1"
+
+
+def append_jsonl(path: str, entry: dict, max_bytes: int = 0):
+    """
+    Append entry to path as one JSON line.
+
+    Once the file would grow past max_bytes it is moved to rotated_path(path),
+    replacing the previous one, and a new file is started, so a log never
+    takes more than about twice max_bytes on disk. 0 means no limit. Callers
+    serialise writes to the same path and handle OSError.
+    """
+    line = json.dumps(entry) + "\n"
+    if max_bytes and os.path.exists(path) and os.path.getsize(path) + len(line.encode("utf-8")) > max_bytes:
+        os.replace(path, rotated_path(path))
+    with open(path, "a", encoding="utf-8") as log:
+        log.write(line)
+
+
+def log_files(path: str) -> list:
+    """
+    The files holding a log written by append_jsonl that exist, oldest first
+    """
+    return [candidate for candidate in (rotated_path(path), path) if os.path.exists(candidate)]
@@ -5,20 +5,36 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from fastapi.staticfiles import StaticFiles
 
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 from pydantic import BaseModel
 
-from openai import AzureOpenAI
-
 from dotenv import load_dotenv
 
 import os
 
-from utils import get_best_faq_answer
+import asyncio
+
+import json
+
+from utils import find_faq_answer, FAQ_ERROR_ANSWER
 
 from utils import search_duckduckgo_for_answer, search_with_conversation_flow, search_duckduckgo_web_scraping
 
+from batching import FAQBatcher
+
+from token_budget import usage_recorder
+
+from speculative import SpeculativeFallback
+
+from answer_store import answer_store, log_question
+
+from azure_pool import DeploymentPool, load_endpoint_configs
+
+from utils import FAQ_MATCH_MODE, GPT_DEPLOYMENT_NAME
+
+from web_jobs import JobQueueFull, WebSearchJobs
+
 # Load your Azure OpenAI configuration
 
 load_dotenv()
@@ -29,22 +45,187 @@ AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2023-12-01-preview")
 
-if not AZURE_OPENAI_API_KEY:
+# Optional pool of endpoint/deployment pairs (JSON list), replacing the single endpoint above
+
+AZURE_OPENAI_ENDPOINTS = os.getenv("AZURE_OPENAI_ENDPOINTS")
+
+AZURE_ROUTING = os.getenv("AZURE_ROUTING", "latency")
+
+AZURE_FAILURE_THRESHOLD = int(os.getenv("AZURE_FAILURE_THRESHOLD", "3"))
+
+AZURE_COOLDOWN_SECONDS = float(os.getenv("AZURE_COOLDOWN_SECONDS", "30"))
+
+AZURE_HEALTH_CHECK_SECONDS = float(os.getenv("AZURE_HEALTH_CHECK_SECONDS", "30"))
+
+# Longest Retry-After a pooled endpoint waits out before failing over instead
+
+AZURE_FAILOVER_RETRY_AFTER_SECONDS = float(os.getenv("AZURE_FAILOVER_RETRY_AFTER_SECONDS", "2"))
+
+# Azure quota of the deployment, used to pace calls client-side (0 = no pacing)
+
+AZURE_REQUESTS_PER_MINUTE = float(os.getenv("AZURE_REQUESTS_PER_MINUTE", "0"))
+
+AZURE_TOKENS_PER_MINUTE = float(os.getenv("AZURE_TOKENS_PER_MINUTE", "0"))
+
+AZURE_MAX_RETRIES = int(os.getenv("AZURE_MAX_RETRIES", "5"))
+
+AZURE_REQUEST_DEADLINE_SECONDS = float(os.getenv("AZURE_REQUEST_DEADLINE_SECONDS", "30"))
+
+# Optional micro-batching of concurrent FAQ lookups into one Azure call
+
+FAQ_BATCH_ENABLED = os.getenv("FAQ_BATCH_ENABLED", "false").lower() == "true"
+
+FAQ_BATCH_WINDOW_MS = float(os.getenv("FAQ_BATCH_WINDOW_MS", "15"))
 
-    raise ValueError("AZURE_OPENAI_API_KEY is missing from environment variables")
+FAQ_BATCH_MAX_SIZE = int(os.getenv("FAQ_BATCH_MAX_SIZE", "8"))
 
-if not AZURE_OPENAI_ENDPOINT:
+# Optional speculative web fallback for questions unlikely to be in the FAQ
 
-    raise ValueError("AZURE_OPENAI_ENDPOINT is missing from environment variables")
+SPECULATIVE_FALLBACK_ENABLED = os.getenv("SPECULATIVE_FALLBACK_ENABLED", "false").lower() == "true"
+
+SPECULATIVE_FALLBACK_THRESHOLD = float(os.getenv("SPECULATIVE_FALLBACK_THRESHOLD", "0.28"))
+
+SPECULATIVE_MAX_INFLIGHT = int(os.getenv("SPECULATIVE_MAX_INFLIGHT", "4"))
+
+SPECULATIVE_MAX_WASTED_PER_MINUTE = int(os.getenv("SPECULATIVE_MAX_WASTED_PER_MINUTE", "30"))
+
+# Optional background jobs for web fallbacks that don't finish within the inline wait
+
+WEB_JOBS_ENABLED = os.getenv("WEB_JOBS_ENABLED", "false").lower() == "true"
+
+WEB_JOB_WORKERS = int(os.getenv("WEB_JOB_WORKERS", "4"))
+
+WEB_JOB_MAX_PENDING = int(os.getenv("WEB_JOB_MAX_PENDING", "100"))
+
+WEB_JOB_TTL_SECONDS = float(os.getenv("WEB_JOB_TTL_SECONDS", "600"))
+
+WEB_JOB_INLINE_WAIT_SECONDS = float(os.getenv("WEB_JOB_INLINE_WAIT_SECONDS", "2"))
 
 # Initialize Azure OpenAI client
 
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    api_version=AZURE_OPENAI_API_VERSION,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
+# Calls are routed across the configured endpoints with failover; each endpoint
+
+# paces its calls to stay within quota and retries throttling itself
+
+client = DeploymentPool(
+
+    load_endpoint_configs(
+
+        AZURE_OPENAI_ENDPOINTS,
+
+        default_api_key=AZURE_OPENAI_API_KEY,
+
+        default_endpoint=AZURE_OPENAI_ENDPOINT,
+
+        default_deployment=GPT_DEPLOYMENT_NAME,
+
+        default_api_version=AZURE_OPENAI_API_VERSION,
+
+        default_requests_per_minute=AZURE_REQUESTS_PER_MINUTE,
+
+        default_tokens_per_minute=AZURE_TOKENS_PER_MINUTE
+
+    ),
+
+    routing=AZURE_ROUTING,
+
+    failure_threshold=AZURE_FAILURE_THRESHOLD,
+
+    cooldown_seconds=AZURE_COOLDOWN_SECONDS,
+
+    health_check_seconds=AZURE_HEALTH_CHECK_SECONDS,
+
+    max_retries=AZURE_MAX_RETRIES,
+
+    deadline_seconds=AZURE_REQUEST_DEADLINE_SECONDS,
+
+    failover_retry_after=AZURE_FAILOVER_RETRY_AFTER_SECONDS
+
 )
 
+faq_batcher = FAQBatcher(client, window_ms=FAQ_BATCH_WINDOW_MS, max_batch_size=FAQ_BATCH_MAX_SIZE) if FAQ_BATCH_ENABLED else None
+
+if faq_batcher and FAQ_MATCH_MODE != "structured":
+
+    print(f"FAQ batching is on: FAQ lookups use structured matching instead of FAQ_MATCH_MODE={FAQ_MATCH_MODE}")
+
+speculative_fallback = SpeculativeFallback(
+
+    threshold=SPECULATIVE_FALLBACK_THRESHOLD,
+
+    max_inflight=SPECULATIVE_MAX_INFLIGHT,
+
+    max_wasted_per_minute=SPECULATIVE_MAX_WASTED_PER_MINUTE
+
+) if SPECULATIVE_FALLBACK_ENABLED else None
+
+
+web_jobs = WebSearchJobs(
+
+    search_duckduckgo_for_answer,
+
+    max_workers=WEB_JOB_WORKERS,
+
+    max_pending=WEB_JOB_MAX_PENDING,
+
+    ttl_seconds=WEB_JOB_TTL_SECONDS
+
+) if WEB_JOBS_ENABLED else None
+
+
+def lookup_faq(question: str) -> dict:
+
+    if faq_batcher:
+
+        return faq_batcher.submit(question)
+
+    return find_faq_answer(question, client)
+
+
+def run_web_search(question: str, running=None) -> dict:
+
+    """
+
+    The web fallback, as a background job when those are enabled.
+
+    Returns {"answer": ...} if the search finished within WEB_JOB_INLINE_WAIT_SECONDS,
+
+    otherwise {"answer": None, "job_id": ..., "status": "pending"} for the client to poll.
+
+    running is a search already under way for the question (a speculated one), used instead of a new search
+
+    """
+
+    if not web_jobs:
+
+        return {"answer": running.result() if running else search_duckduckgo_for_answer(question)}
+
+    try:
+
+        job = web_jobs.submit(question, running)
+
+    except JobQueueFull as e:
+
+        print(f"Web search job queue full ({e}), searching inline")
+
+        return {"answer": running.result() if running else search_duckduckgo_for_answer(question)}
+
+    if job["status"] == "pending":
+
+        job = web_jobs.wait(job["job_id"], WEB_JOB_INLINE_WAIT_SECONDS) or job
+
+    if job["status"] == "done":
+
+        return {"answer": job["answer"]}
+
+    if job["status"] == "error":
+
+        raise RuntimeError(job["error"])
+
+    print(f"Web search for {question!r} continues as job {job['job_id']}")
+
+    return {"answer": None, "job_id": job["job_id"], "status": "pending"}
+
 # Initialize FastAPI app
 
 app = FastAPI()
@@ -89,58 +270,121 @@ def home():
 
     return FileResponse('static/index.html')
 
-# FAQ chatbot route with enhanced fallback sequence
+# The answer pipeline shared by /api/faq and the warm_answers.py job
 
-@app.post("/api/faq")
+def answer_question(question: str, defer_web: bool = False) -> dict:
 
-def answer_faq(request: FAQRequest):
+    """
 
-    try:
+    Answer a question through guidance, the FAQ lookup and the web fallback.
 
-        question = request.question.strip()
+    Returns the answer with its source ("guidance", "faq", "web" or "error") and FAQ ID.
 
-        if not question:
+    With defer_web a slow web fallback comes back as a pending job: answer None and a job_id
 
-            raise HTTPException(status_code=400, detail="No question provided.")
+    """
 
-        print(f"Received question: {question}")  # Debug log
+    # Check for confirmation keywords
+
+    confirmation_keywords = ["yes", "go ahead", "sure", "ok", "okay", "proceed", "search"]
+
+    if any(keyword in question.lower() for keyword in confirmation_keywords):
+
+        # For confirmation, try to provide general guidance
+
+        print("User confirmed - providing general guidance")
+
+        from utils import generate_direct_answer
+
+        guidance_answer = generate_direct_answer(question)
+
+        return {"answer": guidance_answer, "source": "guidance", "faq_id": None}
 
-        # Check for confirmation keywords
+    # First try FAQ, with the web search possibly already running alongside it
 
-        confirmation_keywords = ["yes", "go ahead", "sure", "ok", "okay", "proceed", "search"]
+    if speculative_fallback:
 
-        if any(keyword in question.lower() for keyword in confirmation_keywords):
+        faq_match, speculated_search = speculative_fallback.answer(question, lookup_faq)
 
-            # For confirmation, try to provide general guidance
+    else:
 
-            print("User confirmed - providing general guidance")
+        faq_match, speculated_search = lookup_faq(question), None
 
-            from utils import generate_direct_answer
+    answer = faq_match["answer"]
 
-            guidance_answer = generate_direct_answer(question)
+    print(f"Initial FAQ answer (FAQ ID {faq_match['faq_id']}, confidence {faq_match['confidence']}): {answer}")  # Debug log
 
-            return {"answer": guidance_answer, "needs_confirmation": False}
+    # Check if we need to search the web
 
-        # First try FAQ
+    if faq_match["no_match"]:
 
-        answer = get_best_faq_answer(question, client)
+        print("No FAQ match found, starting fallback sequence...")
 
-        print(f"Initial FAQ answer: {answer}")  # Debug log
+        # Use the enhanced fallback sequence: Instant API → Web scraping → Direct answer
 
-        # Check if we need to search the web
+        if defer_web:
 
-        if "Sorry, I can only answer based on the official ACS FAQs" in answer:
+            # A speculated search gets the same inline wait as a new one before it becomes a job
 
-            print("No FAQ match found, starting fallback sequence...")
+            web = run_web_search(question, speculated_search)
 
-            # Use the enhanced fallback sequence: Instant API → Web scraping → Direct answer
+            if web["answer"] is None:
+
+                return {"answer": None, "source": "web", "faq_id": None, "job_id": web["job_id"]}
+
+            fallback_answer = web["answer"]
+
+        elif speculated_search is not None:
+
+            fallback_answer = speculated_search.result()
+
+        else:
 
             fallback_answer = search_duckduckgo_for_answer(question)
-            print("Final Answer Sent to Frontend:", fallback_answer)
 
-            return {"answer": fallback_answer, "needs_confirmation": False}
+        print("Final Answer Sent to Frontend:", fallback_answer)
 
-        return {"answer": answer, "needs_confirmation": False}
+        return {"answer": fallback_answer, "source": "web", "faq_id": None}
+
+    source = "error" if answer == FAQ_ERROR_ANSWER else "faq"
+
+    return {"answer": answer, "source": source, "faq_id": faq_match["faq_id"]}
+
+# FAQ chatbot route with enhanced fallback sequence
+
+@app.post("/api/faq")
+
+def answer_faq(request: FAQRequest):
+
+    try:
+
+        question = request.question.strip()
+
+        if not question:
+
+            raise HTTPException(status_code=400, detail="No question provided.")
+
+        print(f"Received question: {question}")  # Debug log
+
+        log_question(question)
+
+        # Precomputed answers from warm_answers.py skip the whole pipeline
+
+        stored = answer_store.lookup(question)
+
+        if stored:
+
+            print(f"Serving precomputed {stored['source']} answer")
+
+            return {"answer": stored["answer"], "needs_confirmation": False}
+
+        result = answer_question(question, defer_web=True)
+
+        if result.get("job_id"):
+
+            return {"answer": None, "job_id": result["job_id"], "status": "pending", "needs_confirmation": False}
+
+        return {"answer": result["answer"], "needs_confirmation": False}
         
 
     except Exception as e:
@@ -170,9 +414,7 @@ def enhanced_web_search(request: SearchConfirmRequest):
 
             # Use the complete fallback sequence
 
-            result = search_duckduckgo_for_answer(question)
-
-            return {"answer": result, "needs_confirmation": False}
+            return {**run_web_search(question), "needs_confirmation": False}
 
         else:
 
@@ -200,9 +442,7 @@ def search_web(request: FAQRequest):
 
         print(f"Direct web search for: {question}")
 
-        result = search_duckduckgo_for_answer(question)
-
-        return {"answer": result}
+        return run_web_search(question)
 
     except Exception as e:
 
@@ -210,6 +450,104 @@ def search_web(request: FAQRequest):
 
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
+# State of a background web search job; pending jobs have no answer yet
+
+@app.get("/api/jobs/{job_id}")
+
+def web_job(job_id: str):
+
+    job = web_jobs.get(job_id) if web_jobs else None
+
+    if not job:
+
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+
+    return job
+
+# Server-sent event stream that sends the job once it has finished
+
+@app.get("/api/jobs/{job_id}/events")
+
+async def web_job_events(job_id: str):
+
+    if not web_jobs or not web_jobs.get(job_id):
+
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+
+    async def events():
+
+        waited = 0.0
+
+        while True:
+
+            job = web_jobs.get(job_id)
+
+            if job is None or job["status"] != "pending":
+
+                yield f"event: done\ndata: {json.dumps(job or {'job_id': job_id, 'status': 'expired'})}\n\n"
+
+                return
+
+            # Polling keeps subscribers off the threadpool; comments keep proxies from timing out
+
+            await asyncio.sleep(0.5)
+
+            waited += 0.5
+
+            if waited % 15 == 0:
+
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Queue depth, deduplication and failures of the background web search jobs
+
+@app.get("/api/web-job-stats")
+
+def web_job_stats():
+
+    if not web_jobs:
+
+        return {"enabled": False}
+
+    return {"enabled": True, **web_jobs.stats()}
+
+# Daily token usage of Azure calls since the server started, per path
+
+@app.get("/api/token-usage")
+
+def token_usage():
+
+    return {"daily": usage_recorder.daily_totals()}
+
+# Per-endpoint latency, error, health and throttling stats of the Azure pool
+
+@app.get("/api/azure-stats")
+
+def azure_stats():
+
+    return client.stats()
+
+# Hit rate and latency saved by the speculative web fallback
+
+@app.get("/api/speculation-stats")
+
+def speculation_stats():
+
+    if not speculative_fallback:
+
+        return {"enabled": False}
+
+    return {"enabled": True, **speculative_fallback.stats()}
+
+# Coverage of live traffic by the precomputed answer store
+
+@app.get("/api/answer-store-stats")
+
+def answer_store_stats():
+
+    return answer_store.stats()
+
 # Add this for testing
 
 @app.get("/test")
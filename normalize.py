@@ -0,0 +1,265 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+from faq_data import faqs
+
+load_dotenv()
+
+# Normalise questions (folding, contractions, synonyms, typos) before cache keys and local matching
+
+QUERY_NORMALIZATION_ENABLED = os.getenv("QUERY_NORMALIZATION_ENABLED", "true").lower() == "true"
+
+# Normalise in the local FAQ index too. Off by default: on the bench_normalize sample it costs about two
+# points of hybrid match recall, since corrected typos become query terms the target FAQ may not contain
+
+INDEX_NORMALIZATION_ENABLED = os.getenv("INDEX_NORMALIZATION_ENABLED", "false").lower() == "true"
+
+# General English words the typo corrector leaves alone, one per line
+
+TYPO_WORDLIST_PATH = os.getenv("TYPO_WORDLIST_PATH", os.path.join(os.path.dirname(__file__), "common_words.txt"))
+
+CONTRACTIONS = {
+    "can't": "cannot", "won't": "will not", "shan't": "shall not", "ain't": "is not",
+    "let's": "let us", "what's": "what is", "where's": "where is", "who's": "who is",
+    "how's": "how is", "it's": "it is", "that's": "that is", "there's": "there is",
+    "he's": "he is", "she's": "she is", "i'm": "i am",
+}
+
+CONTRACTION_SUFFIXES = (("n't", " not"), ("'re", " are"), ("'ve", " have"), ("'ll", " will"), ("'d", " would"))
+
+# Agency names spelled out, and words that mean exactly what the FAQs call them
+
+SYNONYMS = {
+    "administration for children s services": "acs",
+    "administration for childrens services": "acs",
+    "office of special investigations": "osi",
+    "office of special investigation": "osi",
+    "state central register": "scr",
+    "statewide central register": "scr",
+    "office of children and family services": "ocfs",
+    "corrective action plan": "cap",
+    "attorney": "lawyer",
+    "attorneys": "lawyers",
+    "kid": "child",
+    "kids": "children",
+}
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+INFLECTION_SUFFIXES = ("s", "es", "d", "ed", "ing", "er", "ers", "ly", "ies", "ied")
+
+
+def fold(text: str) -> str:
+    """
+    Unicode compatibility folding, accents stripped, casefolded, curly quotes made straight
+    """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+        text = text.replace("’", "'").replace("‘", "'")
+    return text.casefold()
+
+
+def expand_contractions(text: str) -> str:
+    if "'" not in text:
+        return text
+    words = []
+    for word in text.split():
+        if word in CONTRACTIONS:
+            word = CONTRACTIONS[word]
+        elif "'" in word:
+            for suffix, replacement in CONTRACTION_SUFFIXES:
+                if word.endswith(suffix) and len(word) > len(suffix):
+                    word = word[: -len(suffix)] + replacement
+                    break
+        words.append(word)
+    return " ".join(words)
+
+
+def _synonym_pattern():
+    # Longest phrases first so "office of special investigations" wins over shorter overlaps
+    phrases = sorted(SYNONYMS, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b")
+
+
+SYNONYM_PATTERN = _synonym_pattern()
+
+
+def apply_synonyms(text: str) -> str:
+    return SYNONYM_PATTERN.sub(lambda match: SYNONYMS[match.group(1)], text)
+
+
+def clean(text: str) -> str:
+    """
+    Folding, contractions, punctuation and synonyms, without typo correction
+    """
+    text = expand_contractions(fold(text))
+    text = " ".join(PUNCTUATION_PATTERN.sub(" ", text).split())
+    return apply_synonyms(text)
+
+
+class TypoCorrector:
+    """
+    SymSpell-style spelling correction against the FAQ vocabulary.
+
+    Every FAQ word seen at least min_count times, or found in known_words, is indexed under all strings
+    reachable by deleting up to max_distance characters; a misspelled word is
+    looked up through its own deletes, so candidates are found without
+    scanning the vocabulary. The closest candidate by Damerau-Levenshtein
+    distance wins, ties going to the more frequent word.
+
+    Only words that can't be real words are corrected: anything in
+    known_words (a general English word list) or the FAQ vocabulary, or an
+    inflection of either, is left alone, as are words under min_length.
+    A candidate is also refused when it only adds an inflection ("charge"
+    -> "charged") or only drops letters that weren't doubled ("mother" ->
+    "other", "adoption" -> "option"), since both are how one real word
+    turns into another.
+    """
+
+    def __init__(self, word_counts: Counter, known_words: frozenset = frozenset(), max_distance: int = 2,
+                 min_length: int = 5, min_count: int = 2):
+        self.word_counts = word_counts
+        self.known_words = known_words
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.deletes = {}
+        for word, count in word_counts.items():
+            if (count < min_count and word not in known_words) or len(word) < min_length - 1:
+                continue
+            for variant in self._deletes(word, max_distance):
+                self.deletes.setdefault(variant, set()).add(word)
+
+    @staticmethod
+    def _deletes(word: str, distance: int) -> set:
+        results = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+            results |= frontier
+        return results
+
+    def _allowed_distance(self, word: str) -> int:
+        return 1 if len(word) < 8 else self.max_distance
+
+    def _in_vocabulary(self, word: str) -> bool:
+        return word in self.word_counts or word in self.known_words
+
+    def is_known(self, word: str) -> bool:
+        """
+        Whether word is a known word or an inflection of one ("offices", "charged", "families", "stopped")
+        """
+        if self._in_vocabulary(word):
+            return True
+        for suffix in INFLECTION_SUFFIXES:
+            if not word.endswith(suffix) or len(word) <= len(suffix) + 1:
+                continue
+            stem = word[: -len(suffix)]
+            stems = [stem]
+            if suffix in ("ed", "ing", "er", "ers"):
+                stems.append(stem + "e")
+            elif suffix in ("ies", "ied"):
+                stems.append(stem + "y")
+            if len(stem) > 2 and stem[-1] == stem[-2]:
+                stems.append(stem[:-1])
+            if any(self._in_vocabulary(candidate) for candidate in stems):
+                return True
+        return False
+
+    def correct(self, word: str) -> str:
+        if len(word) < self.min_length or not word.isalpha() or self.is_known(word):
+            return word
+
+        allowed = self._allowed_distance(word)
+        candidates = set()
+        for variant in self._deletes(word, allowed):
+            candidates |= self.deletes.get(variant, set())
+
+        best, best_key = word, None
+        for candidate in candidates:
+            if _adds_inflection(word, candidate) or _drops_undoubled_letters(word, candidate):
+                continue
+            distance = damerau_levenshtein(word, candidate, allowed)
+            if distance > allowed:
+                continue
+            key = (distance, -self.word_counts[candidate], candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+
+def _adds_inflection(word: str, candidate: str) -> bool:
+    return candidate.startswith(word) and candidate[len(word):] in INFLECTION_SUFFIXES
+
+
+def _drops_undoubled_letters(word: str, candidate: str) -> bool:
+    """
+    Whether candidate is word with letters removed, at least one of which wasn't a doubled letter
+    """
+    if len(candidate) >= len(word):
+        return False
+    matched, undoubled = 0, False
+    for i, char in enumerate(word):
+        if matched < len(candidate) and char == candidate[matched]:
+            matched += 1
+        elif not (i > 0 and word[i - 1] == char):
+            undoubled = True
+    return matched == len(candidate) and undoubled
+
+
+def damerau_levenshtein(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance, returning limit + 1 as soon as it is exceeded
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def load_wordlist(path: str) -> frozenset:
+    if not path or not os.path.exists(path):
+        return frozenset()
+    with open(path, encoding="utf-8") as wordlist:
+        return frozenset(fold(line.strip()) for line in wordlist if line.strip() and not line.startswith("#"))
+
+
+@lru_cache(maxsize=1)
+def get_typo_corrector() -> TypoCorrector:
+    """
+    Corrector built from the FAQ vocabulary, after cleaning so synonym targets are included
+    """
+    counts = Counter()
+    for faq in faqs:
+        counts.update(WORD_PATTERN.findall(clean(faq["question"] + " " + faq["answer"])))
+    counts.update(SYNONYMS.values())
+    return TypoCorrector(counts, load_wordlist(TYPO_WORDLIST_PATH))
+
+
+@lru_cache(maxsize=4096)
+def normalize_question(question: str) -> str:
+    """
+    Canonical form of a user question used for cache keys and local matching
+    """
+    corrector = get_typo_corrector()
+    words = [corrector.correct(word) for word in clean(question).split()]
+    # Corrections can land on a synonym source ("kid" from "kidd"), so map once more
+    return apply_synonyms(" ".join(words))
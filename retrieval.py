@@ -0,0 +1,132 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from faq_data import faqs
+from normalize import INDEX_NORMALIZATION_ENABLED, QUERY_NORMALIZATION_ENABLED, clean, normalize_question
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "i", "my", "me", "to", "of", "in", "on", "for",
+    "be", "if", "can", "do", "does", "what", "will", "when", "how", "and", "or", "it", "that",
+    "this", "with", "as", "at", "by", "from", "have", "has", "he", "she", "his", "her", "him",
+    "you", "your", "they", "their", "them", "there", "any", "about", "who", "which", "would",
+    "should", "could", "am", "been", "into", "than", "then", "so", "not", "no", "yes",
+}
+
+
+@lru_cache(maxsize=16384)
+def _stem(word: str) -> str:
+    """
+    Very light suffix stripping so "investigation", "investigated" and "investigations" meet
+    """
+    for suffix in ("ations", "ation", "ings", "ing", "ies", "ied", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased, stemmed content words of a text
+    """
+    return [_stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+
+
+class FAQIndex:
+    """
+    In-memory lexical (BM25) and vector (TF-IDF cosine) index over the FAQ database.
+
+    Every score is scaled to 0..1 so the same thresholds work for each method.
+    Search results are lists of (faq_id, score) with 1-based FAQ IDs, best first.
+    With normalize, FAQ text goes through normalize.clean and queries through
+    normalize_question, so synonyms and typos land on the same terms.
+    """
+
+    def __init__(self, entries: list, question_weight: int = 2, k1: float = 1.2, b: float = 0.75,
+                 normalize: bool = True):
+        self.k1 = k1
+        self.normalize = normalize
+        prepare = clean if normalize else str
+        # Questions are short, repeat them so they count more than the long answers
+        documents = [
+            tokenize(prepare(" ".join([entry["question"]] * question_weight + [entry["answer"]])))
+            for entry in entries
+        ]
+
+        self.vocabulary = {}
+        for tokens in documents:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        term_counts = np.zeros((len(documents), len(self.vocabulary)))
+        for row, tokens in enumerate(documents):
+            for token in tokens:
+                term_counts[row, self.vocabulary[token]] += 1
+
+        doc_count = len(documents)
+        doc_freq = np.count_nonzero(term_counts, axis=0)
+
+        # BM25 term weights, precomputed per document so a query is a column sum
+        lengths = term_counts.sum(axis=1, keepdims=True)
+        length_norm = 1 - b + b * lengths / max(lengths.mean(), 1)
+        self.bm25_idf = np.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+        self.bm25_weights = term_counts * (k1 + 1) / (term_counts + k1 * length_norm)
+
+        # Sublinear TF-IDF vectors, L2 normalised for cosine similarity
+        self.tfidf_idf = np.log((1 + doc_count) / (1 + doc_freq)) + 1
+        vectors = np.where(term_counts > 0, 1 + np.log(np.maximum(term_counts, 1)), 0) * self.tfidf_idf
+        self.vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def _term_ids(self, query: str) -> list:
+        if self.normalize:
+            query = normalize_question(query)
+        return sorted({self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary})
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        """
+        BM25 score per FAQ divided by the best score this query could reach
+        """
+        term_ids = self._term_ids(query)
+        if not term_ids:
+            return np.zeros(len(self.vectors))
+        idf = self.bm25_idf[term_ids]
+        return self.bm25_weights[:, term_ids] @ idf / (idf.sum() * (self.k1 + 1))
+
+    def cosine_scores(self, query: str) -> np.ndarray:
+        """
+        Cosine similarity between the query's TF-IDF vector and each FAQ
+        """
+        term_ids = self._term_ids(query)
+        if not term_ids:
+            return np.zeros(len(self.vectors))
+        # Query terms are counted once, so the query vector is just the idf of its terms
+        weights = self.tfidf_idf[term_ids]
+        return self.vectors[:, term_ids] @ weights / np.linalg.norm(weights)
+
+    def scores(self, query: str, method: str = "hybrid", alpha: float = 0.5) -> np.ndarray:
+        if method == "lexical":
+            return self.bm25_scores(query)
+        if method == "vector":
+            return self.cosine_scores(query)
+        if method == "hybrid":
+            return alpha * self.bm25_scores(query) + (1 - alpha) * self.cosine_scores(query)
+        raise ValueError(f"Unknown retrieval method: {method}")
+
+    def search(self, query: str, k: int = 3, method: str = "hybrid", min_score: float = 0.0) -> list:
+        """
+        Top k FAQs for the query, dropping those scoring below min_score
+        """
+        scores = self.scores(query, method)
+        best = np.argsort(-scores, kind="stable")[:k]
+        return [(int(i) + 1, float(scores[i])) for i in best if scores[i] > 0 and scores[i] >= min_score]
+
+
+@lru_cache(maxsize=1)
+def get_faq_index() -> FAQIndex:
+    """
+    Shared index over faq_data.faqs, built on first use
+    """
+    return FAQIndex(faqs, normalize=QUERY_NORMALIZATION_ENABLED and INDEX_NORMALIZATION_ENABLED)
@@ -0,0 +1,112 @@
+import os
+import re
+
+import numpy as np
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from normalize import clean
+from retrieval import tokenize
+
+load_dotenv()
+
+# Most characters of page text sent with one web fallback answer, spread over all result pages
+
+WEB_SNIPPET_CHAR_BUDGET = int(os.getenv("WEB_SNIPPET_CHAR_BUDGET", "800"))
+
+# Blocks shorter than this are navigation, captions and the like
+
+MIN_PASSAGE_CHARS = 40
+
+
+def page_passages(page_html: str) -> list:
+    """
+    Text of every paragraph and list item on a page long enough to be content
+    """
+    soup = BeautifulSoup(page_html, "html.parser")
+    passages = []
+    for element in soup.find_all(["p", "li"]):
+        # Nested paragraphs inside a list item are picked up on their own
+        if element.name == "li" and element.find("p"):
+            continue
+        text = re.sub(r"\s+", " ", element.get_text(" ", strip=True))
+        if len(text) > MIN_PASSAGE_CHARS:
+            passages.append(text)
+    return passages
+
+
+def passage_terms(passage: str) -> list:
+    return tokenize(clean(passage))
+
+
+def score_passages(query: str, documents: list, k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """
+    BM25 score of each passage's passage_terms against the query, the passages being the whole corpus
+    """
+    query_terms = sorted(set(tokenize(clean(query))))
+    if not documents or not query_terms:
+        return np.zeros(len(documents))
+
+    columns = {term: i for i, term in enumerate(query_terms)}
+    term_counts = np.zeros((len(documents), len(query_terms)))
+    lengths = np.array([len(tokens) for tokens in documents], dtype=float)
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            if token in columns:
+                term_counts[row, columns[token]] += 1
+
+    doc_freq = np.count_nonzero(term_counts, axis=0)
+    idf = np.log(1 + (len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+    length_norm = 1 - b + b * lengths / max(lengths.mean(), 1)
+    return (term_counts * (k1 + 1) / (term_counts + k1 * length_norm[:, None])) @ idf
+
+
+def select_passages(query: str, pages: list, char_budget: int = WEB_SNIPPET_CHAR_BUDGET,
+                    similarity: float = 0.8) -> list:
+    """
+    Best passages for the query across pages, within char_budget characters in total.
+
+    pages is a list of passage lists, one per page; the result has one list
+    per page with the chosen passages in page order. Passages are taken best
+    score first, skipping any whose content words overlap an already chosen
+    one by at least `similarity` (Jaccard), which drops the headers and
+    footers repeated on every page. Passages that don't fit are skipped in
+    favour of shorter ones; if nothing matches the query at all, the first
+    passages of each page are used as before.
+    """
+    candidates = [(page, position, passage)
+                  for page, passages in enumerate(pages)
+                  for position, passage in enumerate(passages)]
+    if not candidates:
+        return [[] for _ in pages]
+
+    documents = [passage_terms(passage) for _, _, passage in candidates]
+    scores = score_passages(query, documents)
+    if scores.max() > 0:
+        order = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+    else:
+        # Round-robin over pages so each contributes its opening passage first
+        order = sorted(range(len(candidates)), key=lambda i: (candidates[i][1], candidates[i][0]))
+
+    chosen, fingerprints, used = [], [], 0
+    for i in order:
+        page, position, passage = candidates[i]
+        fingerprint = frozenset(documents[i])
+        if any(len(fingerprint & other) / max(len(fingerprint | other), 1) >= similarity
+               for other in fingerprints):
+            continue
+        if used + len(passage) > char_budget:
+            if chosen:
+                continue
+            # The best passage alone is too long: cut it at a word boundary
+            passage = passage[:char_budget].rsplit(" ", 1)[0] + "..."
+        chosen.append((page, position, passage))
+        fingerprints.append(fingerprint)
+        used += len(passage)
+        if used >= char_budget:
+            break
+
+    selected = [[] for _ in pages]
+    for page, _, passage in sorted(chosen):
+        selected[page].append(passage)
+    return selected
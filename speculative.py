@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from retrieval import get_faq_index
+from utils import search_duckduckgo_for_answer
+
+
+class SpeculativeFallback:
+    """
+    Starts the web fallback alongside the FAQ lookup when a match looks unlikely.
+
+    A cheap local relevance score (the best hybrid retrieval score against the
+    FAQ database) decides whether to speculate. If the FAQ lookup then finds
+    no match, the web answer is already on its way; if it does match, the
+    search is cancelled before its next step and counted as wasted.
+
+    Wasted work is capped two ways: at most max_inflight speculative searches
+    run at once, and once max_wasted_per_minute searches were thrown away in
+    the last minute, speculation pauses until the window clears.
+    """
+
+    def __init__(self, threshold: float = 0.28, max_inflight: int = 4, max_wasted_per_minute: int = 30):
+        self.threshold = threshold
+        self.max_wasted_per_minute = max_wasted_per_minute
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="speculative-search")
+        self._lock = threading.Lock()
+        self._recent_waste = deque()
+        self._stats = {
+            "lookups": 0,
+            "speculations": 0,
+            "hits": 0,
+            "wasted": 0,
+            "skipped_inflight_cap": 0,
+            "skipped_waste_cap": 0,
+            "latency_saved_ms": 0.0,
+            "wasted_search_ms": 0.0,
+        }
+
+    def relevance(self, question: str) -> float:
+        scores = get_faq_index().scores(question)
+        return float(scores.max()) if len(scores) else 0.0
+
+    def answer(self, question: str, faq_lookup) -> tuple:
+        """
+        Run faq_lookup(question) and, when it finds no match, hand over the speculated web fallback.
+
+        Returns (faq_match, search) where search is the future of the
+        speculated search_duckduckgo_for_answer call, or None if the FAQ
+        matched or no search was speculated; the caller runs the fallback
+        itself in the latter case. The future is returned without waiting on
+        it, so the caller decides how long to block.
+        """
+        with self._lock:
+            self._stats["lookups"] += 1
+
+        speculation = None
+        if self.relevance(question) < self.threshold:
+            speculation = self._start(question)
+
+        started = time.perf_counter()
+        faq_match = faq_lookup(question)
+        faq_elapsed = time.perf_counter() - started
+
+        if not faq_match["no_match"]:
+            if speculation:
+                self._discard(speculation)
+            return faq_match, None
+
+        if speculation is None:
+            return faq_match, None
+
+        future, search_started, _ = speculation
+        with self._lock:
+            self._stats["hits"] += 1
+        future.add_done_callback(lambda _: self._record_saving(faq_elapsed, time.perf_counter() - search_started))
+        return faq_match, future
+
+    def _record_saving(self, faq_elapsed: float, search_elapsed: float):
+        with self._lock:
+            # The part of the search that overlapped with the FAQ lookup is time the user didn't wait
+            self._stats["latency_saved_ms"] += min(faq_elapsed, search_elapsed) * 1000
+
+    def _start(self, question: str):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_waste and now - self._recent_waste[0] > 60:
+                self._recent_waste.popleft()
+            if len(self._recent_waste) >= self.max_wasted_per_minute:
+                self._stats["skipped_waste_cap"] += 1
+                return None
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["skipped_inflight_cap"] += 1
+            return None
+
+        print(f"Low FAQ relevance, starting web search early for: {question}")
+        cancel_event = threading.Event()
+        search_started = time.perf_counter()
+        try:
+            future = self._executor.submit(search_duckduckgo_for_answer, question, cancel_event)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._stats["speculations"] += 1
+        return future, search_started, cancel_event
+
+    def _discard(self, speculation):
+        future, search_started, cancel_event = speculation
+        cancel_event.set()
+        future.cancel()
+        with self._lock:
+            self._stats["wasted"] += 1
+            self._stats["wasted_search_ms"] += (time.perf_counter() - search_started) * 1000
+            self._recent_waste.append(time.monotonic())
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        resolved = stats["hits"] + stats["wasted"]
+        stats["hit_rate"] = stats["hits"] / resolved if resolved else None
+        return stats
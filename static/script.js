@@ -34,6 +34,9 @@ class ChatBot {
         }
         
         this.apiUrl = '/api/faq';
+        this.jobsUrl = '/api/jobs';
+        this.jobPollInterval = 2000;
+        this.jobTimeout = 120000;
         this.isOpen = false;
         
         this.initEventListeners();
@@ -144,6 +147,7 @@ class ChatBot {
         } catch (error) {
             console.error('Error calling API:', error);
             this.hideTypingIndicator();
+            this.hidePendingNotice();
             this.addMessage('Sorry, I encountered an error. Please try again later.', 'bot');
         }
     }
@@ -173,6 +177,17 @@ class ChatBot {
             const data = await response.json();
             console.log('API Response:', data);
             
+            // Slow web searches come back as a job to wait for
+            if (data.status === 'pending' && data.job_id) {
+                this.showPendingNotice();
+                const job = await this.waitForJob(data.job_id);
+                this.hidePendingNotice();
+                if (job.status !== 'done') {
+                    throw new Error(`Web search job ${data.job_id} ended with status ${job.status}`);
+                }
+                return job.answer || 'No response received';
+            }
+            
             return data.answer || 'No response received';
             
         } catch (error) {
@@ -181,6 +196,86 @@ class ChatBot {
         }
     }
     
+    waitForJob(jobId) {
+        // Subscribe to the job's event stream, polling instead if streams aren't available
+        return new Promise((resolve, reject) => {
+            let stopped = false;
+            const timer = setTimeout(() => {
+                // Also ends a polling loop that is still running
+                stopped = true;
+                if (source) source.close();
+                reject(new Error('Timed out waiting for the web search'));
+            }, this.jobTimeout);
+            const finish = (job) => {
+                clearTimeout(timer);
+                resolve(job);
+            };
+            
+            let source = null;
+            if (window.EventSource) {
+                source = new EventSource(`${this.jobsUrl}/${jobId}/events`);
+                source.addEventListener('done', (event) => {
+                    source.close();
+                    finish(JSON.parse(event.data));
+                });
+                source.onerror = () => {
+                    console.log('Job event stream failed, polling instead');
+                    source.close();
+                    this.pollJob(jobId, finish, reject, () => stopped);
+                };
+            } else {
+                this.pollJob(jobId, finish, reject, () => stopped);
+            }
+        });
+    }
+    
+    async pollJob(jobId, resolve, reject, isStopped) {
+        if (isStopped()) return;
+        try {
+            const response = await fetch(`${this.jobsUrl}/${jobId}`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const job = await response.json();
+            if (isStopped()) return;
+            if (job.status === 'pending') {
+                setTimeout(() => this.pollJob(jobId, resolve, reject, isStopped), this.jobPollInterval);
+            } else {
+                resolve(job);
+            }
+        } catch (error) {
+            console.error('Polling job failed:', error);
+            reject(error);
+        }
+    }
+    
+    showPendingNotice() {
+        if (!this.chatMessages) return;
+        
+        this.hidePendingNotice();
+        const noticeDiv = document.createElement('div');
+        noticeDiv.className = 'message bot-message pending-notice';
+        
+        const noticeContent = document.createElement('div');
+        noticeContent.className = 'message-content';
+        noticeContent.textContent = 'Still searching the web for an answer, this can take a little while...';
+        
+        noticeDiv.appendChild(noticeContent);
+        // Keep the typing indicator below the notice
+        const typingIndicator = this.chatMessages.querySelector('.typing-indicator');
+        this.chatMessages.insertBefore(noticeDiv, typingIndicator);
+        this.chatMessages.scrollTop = this.chatMessages.scrollHeight;
+    }
+    
+    hidePendingNotice() {
+        if (!this.chatMessages) return;
+        
+        const notice = this.chatMessages.querySelector('.pending-notice');
+        if (notice) {
+            notice.remove();
+        }
+    }
+    
     addMessage(content, sender) {
         if (!this.chatMessages) {
             console.error('chatMessages element not found');
@@ -0,0 +1,231 @@
+"""
+Token accounting for Azure OpenAI calls and a prompt-size governor.
+
+Usage reported by Azure (or a local estimate when it is missing) is recorded
+per request and per path, kept as daily totals in memory and appended to
+TOKEN_USAGE_LOG as JSON lines, rotated once it reaches TOKEN_USAGE_LOG_MAX_BYTES. The governor keeps FAQ prompts under
+FAQ_PROMPT_TOKEN_BUDGET by sending fewer, more relevant FAQs and by
+shortening their answers where the model does not need to repeat them.
+
+Daily report from the log:
+
+    python -m token_budget --days 7
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+from faq_data import faqs
+from jsonl_log import append_jsonl, log_files
+from retrieval import get_faq_index
+
+load_dotenv()
+
+# Prompt token budget for FAQ lookups, 0 sends the whole FAQ database
+
+FAQ_PROMPT_TOKEN_BUDGET = int(os.getenv("FAQ_PROMPT_TOKEN_BUDGET", "0"))
+
+# JSON lines file every Azure call is appended to, empty to keep totals in memory only
+
+TOKEN_USAGE_LOG = os.getenv("TOKEN_USAGE_LOG", "token_usage.jsonl")
+
+# Size at which the usage log is rotated to TOKEN_USAGE_LOG + ".1", replacing the older one
+
+TOKEN_USAGE_LOG_MAX_BYTES = int(os.getenv("TOKEN_USAGE_LOG_MAX_BYTES", "10000000"))
+
+# Answer lengths tried, longest first, before the governor starts dropping FAQs
+ANSWER_CHAR_STEPS = (1000, 500, 250, 120, 0)
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+|[^\sA-Za-z0-9]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Offline approximation of the GPT tokenizer: about four characters per
+    token for words and one token per punctuation mark
+    """
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in TOKEN_PATTERN.findall(text or ""))
+
+
+def faq_entry_text(faq_id: int, answer_chars=None, with_ids: bool = True) -> str:
+    """
+    One FAQ as it appears in a prompt, optionally with its answer cut to answer_chars
+    """
+    faq = faqs[faq_id - 1]
+    answer = faq["answer"]
+    if answer_chars is not None and len(answer) > answer_chars:
+        answer = answer[:answer_chars].rstrip() + "..."
+    prefix = f"[{faq_id}] " if with_ids else ""
+    return f"{prefix}Q: {faq['question']}\nA: {answer}\n"
+
+
+def plan_faq_context(questions: list, overhead_tokens: int, allow_truncation: bool,
+                     budget: int = None, with_ids: bool = True) -> list:
+    """
+    Choose which FAQs (and how much of each answer) go into a prompt.
+
+    Returns a list of (faq_id, answer_chars) with answer_chars None for the full
+    answer. Without a budget, or when everything fits, that is the whole FAQ
+    database. Otherwise FAQs are ranked by relevance to the questions; when
+    allow_truncation is set every answer is shortened step by step first, and
+    the least relevant FAQs are dropped last. Answer-writing prompts pass
+    allow_truncation=False since the model has to reproduce the answer.
+    """
+    budget = FAQ_PROMPT_TOKEN_BUDGET if budget is None else budget
+    all_ids = list(range(1, len(faqs) + 1))
+    full_plan = [(faq_id, None) for faq_id in all_ids]
+    if budget <= 0:
+        return full_plan
+
+    available = budget - overhead_tokens
+
+    def cost(plan):
+        return sum(estimate_tokens(faq_entry_text(faq_id, chars, with_ids)) for faq_id, chars in plan)
+
+    if cost(full_plan) <= available:
+        return full_plan
+
+    index = get_faq_index()
+    relevance = {faq_id: 0.0 for faq_id in all_ids}
+    for question in questions:
+        for i, score in enumerate(index.scores(question)):
+            relevance[i + 1] = max(relevance[i + 1], float(score))
+    ranked = sorted(all_ids, key=lambda faq_id: -relevance[faq_id])
+
+    steps = ANSWER_CHAR_STEPS if allow_truncation else (None,)
+    plan = None
+    for chars in steps:
+        if cost([(faq_id, chars) for faq_id in ranked]) <= available:
+            plan = [(faq_id, chars) for faq_id in ranked]
+            break
+
+    if plan is None:
+        # Even the shortest entries don't all fit, keep the most relevant ones.
+        # The best candidate always goes in so the database is never empty.
+        plan, used = [], 0
+        for faq_id in ranked:
+            entry_cost = estimate_tokens(faq_entry_text(faq_id, steps[-1], with_ids))
+            if plan and used + entry_cost > available:
+                break
+            plan.append((faq_id, steps[-1]))
+            used += entry_cost
+
+    print(f"Prompt budget {budget}: sending {len(plan)} of {len(faqs)} FAQs, answers cut to {plan[0][1]} chars")
+    return plan
+
+
+class TokenUsageRecorder:
+    """
+    Thread-safe per-day, per-path totals of the tokens spent on Azure calls
+    """
+
+    def __init__(self, log_path: str = None, max_log_bytes: int = 0):
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        self._lock = threading.Lock()
+        self._daily = defaultdict(lambda: defaultdict(_empty_totals))
+
+    def record(self, path: str, prompt_tokens: int, completion_tokens: int,
+               estimated_prompt_tokens: int = None, estimated: bool = False):
+        now = time.time()
+        day = time.strftime("%Y-%m-%d", time.gmtime(now))
+        entry = {
+            "ts": round(now, 3),
+            "date": day,
+            "path": path,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "estimated": estimated,
+        }
+
+        with self._lock:
+            _add_to_totals(self._daily[day][path], entry)
+            if self.log_path:
+                try:
+                    append_jsonl(self.log_path, entry, self.max_log_bytes)
+                except OSError as e:
+                    print(f"Error writing token usage log: {str(e)}")
+
+    def record_completion(self, path: str, response, prompt_text: str):
+        """
+        Record a chat completion, falling back to local estimates when Azure sent no usage
+        """
+        estimated_prompt = estimate_tokens(prompt_text)
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.prompt_tokens is not None:
+            self.record(path, usage.prompt_tokens, usage.completion_tokens or 0, estimated_prompt)
+        else:
+            content = response.choices[0].message.content if response.choices else ""
+            self.record(path, estimated_prompt, estimate_tokens(content), estimated_prompt, estimated=True)
+
+    def daily_totals(self) -> dict:
+        """
+        {date: {path: totals}} for everything recorded since the process started
+        """
+        with self._lock:
+            return {day: {path: dict(totals) for path, totals in paths.items()}
+                    for day, paths in self._daily.items()}
+
+
+def _empty_totals() -> dict:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_prompt_tokens": 0}
+
+
+def _add_to_totals(totals: dict, entry: dict):
+    totals["requests"] += 1
+    totals["prompt_tokens"] += entry["prompt_tokens"]
+    totals["completion_tokens"] += entry["completion_tokens"]
+    totals["estimated_prompt_tokens"] += entry.get("estimated_prompt_tokens") or 0
+
+
+def load_daily_totals(log_path: str) -> dict:
+    """
+    Rebuild {date: {path: totals}} from a usage log and its rotated predecessor
+    """
+    daily = defaultdict(lambda: defaultdict(_empty_totals))
+    for path in log_files(log_path):
+        with open(path, encoding="utf-8") as log:
+            for line in log:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                _add_to_totals(daily[entry["date"]][entry["path"]], entry)
+    return daily
+
+
+def format_daily_report(daily: dict, days: int = 7) -> str:
+    lines = [f"{'date':<12}{'path':<18}{'requests':>10}{'prompt':>12}{'completion':>12}{'avg prompt':>12}"]
+    for day in sorted(daily)[-days:]:
+        for path in sorted(daily[day]):
+            totals = daily[day][path]
+            average = totals["prompt_tokens"] / totals["requests"] if totals["requests"] else 0
+            lines.append(f"{day:<12}{path:<18}{totals['requests']:>10}{totals['prompt_tokens']:>12}"
+                         f"{totals['completion_tokens']:>12}{average:>12.0f}")
+    return "\n".join(lines)
+
+
+usage_recorder = TokenUsageRecorder(TOKEN_USAGE_LOG or None, TOKEN_USAGE_LOG_MAX_BYTES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily token usage report")
+    parser.add_argument("--log", default=TOKEN_USAGE_LOG or "token_usage.jsonl")
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    if not log_files(args.log):
+        parser.exit(1, f"No token usage log at {args.log}\n")
+    print(format_daily_report(load_daily_totals(args.log), args.days))
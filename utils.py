@@ -4,44 +4,58 @@ from openai import AzureOpenAI
 
 import os
 
+import re
+
+import json
+
 from dotenv import load_dotenv
 
 import requests
 
-from bs4 import BeautifulSoup
+
+from token_budget import estimate_tokens, faq_entry_text, plan_faq_context, usage_recorder
+
+from snippets import page_passages, select_passages
 
 load_dotenv()
 
-# Get the GPT model deployment name from environment
+# Get the GPT model deployment name from environment (the oddly named "gpt-35-turbo" variable is still honoured)
 
-GPT_DEPLOYMENT_NAME = os.getenv("gpt-35-turbo", "gpt-35-turbo")
+GPT_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("gpt-35-turbo", "gpt-35-turbo")
 
+# Reply used when the question has no close match in the FAQ database
 
-def get_best_faq_answer(user_question: str, client: AzureOpenAI) -> str:
+FAQ_NO_MATCH_ANSWER = "Sorry, I can only answer based on the official ACS FAQs. Do you want me to provide you an answer from the web?"
 
-    """
+FAQ_ERROR_ANSWER = "Sorry, I encountered an error while processing your question. Please try again."
 
-    Find the best FAQ answer using GPT-3.5-turbo for direct matching and response
+# "answer" lets the model write the FAQ answer, "structured" asks only for the FAQ ID
+# and serves the stored answer
 
-    """
+FAQ_MATCH_MODE = os.getenv("FAQ_MATCH_MODE", "answer").lower()
 
-    # Create a context with all FAQ data
+# Structured matches below this confidence are treated as no match
 
-    faq_context = "\n".join([
+FAQ_MATCH_MIN_CONFIDENCE = float(os.getenv("FAQ_MATCH_MIN_CONFIDENCE", "0.5"))
 
-        f"Q: {faq['question']}\nA: {faq['answer']}\n"
 
-        for faq in faqs
+def get_best_faq_answer(user_question: str, client: AzureOpenAI) -> str:
 
-    ])
+    """
+
+    Find the best FAQ answer using GPT-3.5-turbo for direct matching and response
+
+    """
 
     # Create a prompt for GPT to find the best matching FAQ
 
-    prompt = f"""You are an ACS FAQ assistant. Based on the following FAQ database, answer the user's question.
+    def build_prompt(faq_context: str) -> str:
+
+        return f"""You are an ACS FAQ assistant. Based on the following FAQ database, answer the user's question.
 
 If you find a closely related question in the FAQ database, provide the corresponding answer.
 
-If no closely related question exists, respond with: "Sorry, I can only answer based on the official ACS FAQs. Do you want me to provide you an answer from the web?"
+If no closely related question exists, respond with: "{FAQ_NO_MATCH_ANSWER}"
 
 FAQ Database:
 
@@ -61,6 +75,12 @@ Instructions:
 
 Answer:"""
 
+    # The model has to repeat the answer, so the prompt budget may drop FAQs but never shortens them
+
+    faq_context = build_faq_context([user_question], build_prompt(""), allow_truncation=False, with_ids=False)
+
+    prompt = build_prompt(faq_context)
+
     try:
 
         response = client.chat.completions.create(
@@ -81,19 +101,234 @@ Answer:"""
 
         )
 
+        usage_recorder.record_completion("faq_answer", response, prompt)
+
         return response.choices[0].message.content.strip()
 
     except Exception as e:
 
-        return f"Sorry, I encountered an error while processing your question. Please try again."
+        return FAQ_ERROR_ANSWER
+
+
+def find_faq_answer(user_question: str, client: AzureOpenAI) -> dict:
+
+    """
+
+    Look up the FAQ answer for a question using the configured FAQ_MATCH_MODE.
+
+    Returns a dict with the answer text, the 1-based FAQ ID (None if unknown),
+
+    the model's confidence and a no_match flag telling the caller to fall back to the web
+
+    """
+
+    if FAQ_MATCH_MODE != "structured":
+
+        answer = get_best_faq_answer(user_question, client)
+
+        return {
+
+            "answer": answer,
+
+            "faq_id": None,
+
+            "confidence": None,
+
+            "no_match": FAQ_NO_MATCH_ANSWER.split(".")[0] in answer
+
+        }
+
+    try:
+
+        faq_id, confidence = match_faq_id(user_question, client)
+
+    except Exception as e:
+
+        print(f"Error in match_faq_id: {str(e)}")
+
+        return faq_error_result()
+
+    return faq_match_result(faq_id, confidence)
+
+
+def faq_error_result() -> dict:
+
+    """
+
+    find_faq_answer result when the lookup itself failed; the error is shown instead of searching the web
+
+    """
+
+    return {"answer": FAQ_ERROR_ANSWER, "faq_id": None, "confidence": None, "no_match": False}
+
+
+def faq_match_result(faq_id, confidence) -> dict:
+
+    """
+
+    Build the find_faq_answer result for a structured match, serving the stored answer verbatim
+
+    """
+
+    if faq_id is None or (confidence is not None and confidence < FAQ_MATCH_MIN_CONFIDENCE):
+
+        return {"answer": FAQ_NO_MATCH_ANSWER, "faq_id": None, "confidence": confidence, "no_match": True}
+
+    return {"answer": faqs[faq_id - 1]["answer"], "faq_id": faq_id, "confidence": confidence, "no_match": False}
 
 
-def search_duckduckgo_for_answer(question: str) -> str:
+def match_faq_id(user_question: str, client: AzureOpenAI) -> tuple:
+
+    """
+
+    Ask the model only for the ID of the matching FAQ and its confidence.
+
+    Returns (faq_id, confidence) where faq_id is 1-based or None when nothing matches
+
+    """
+
+    def build_prompt(faq_context: str) -> str:
+
+        return f"""You are an ACS FAQ assistant. Find the FAQ in the database below that answers the user's question.
+
+FAQ Database:
+
+{faq_context}
+
+User Question: {user_question}
+
+Instructions:
+
+- Pick the number of the FAQ that closely matches the question
+
+- Use "none" if no closely related question exists
+
+- Do not make up matches that are not in the FAQ database
+
+Respond with JSON only, in this format:
+{{"faq_id": 3, "confidence": 0.9}}"""
+
+    prompt = build_prompt(build_faq_context([user_question], build_prompt(""), allow_truncation=True))
+
+    response = client.chat.completions.create(
+
+        model=GPT_DEPLOYMENT_NAME,
+
+        messages=[
+
+            {"role": "system", "content": "You are a helpful ACS FAQ assistant. Only match questions to the provided FAQ database."},
+
+            {"role": "user", "content": prompt}
+
+        ],
+
+        max_tokens=30,
+
+        temperature=0
+
+    )
+
+    usage_recorder.record_completion("faq_structured", response, prompt)
+
+    data = extract_json_object(response.choices[0].message.content) or {}
+
+    return parse_faq_id(data.get("faq_id")), parse_confidence(data.get("confidence"))
+
+
+def build_faq_context(questions: list, prompt_without_context: str, allow_truncation: bool,
+
+                      with_ids: bool = True) -> str:
+
+    """
+
+    FAQ database for a prompt, cut down to FAQ_PROMPT_TOKEN_BUDGET when one is set.
+
+    Entries are prefixed with their 1-based ID when with_ids is set
+
+    """
+
+    # Allow for the system message and chat formatting on top of the prompt itself
+
+    overhead_tokens = estimate_tokens(prompt_without_context) + 30
+
+    plan = plan_faq_context(questions, overhead_tokens, allow_truncation, with_ids=with_ids)
+
+    return "\n".join([
+
+        faq_entry_text(faq_id, answer_chars, with_ids)
+
+        for faq_id, answer_chars in plan
+
+    ])
+
+
+def extract_json_object(content: str):
+
+    """
+
+    Parse the first JSON object in a model reply, or None if there isn't one
+
+    """
+
+    match = re.search(r"\{.*\}", content or "", re.DOTALL)
+
+    if not match:
+
+        return None
+
+    try:
+
+        data = json.loads(match.group(0))
+
+    except ValueError:
+
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def parse_faq_id(value):
+
+    """
+
+    Validate a FAQ ID returned by the model, None for "none" or anything out of range
+
+    """
+
+    if isinstance(value, bool):
+
+        return None
+
+    try:
+
+        faq_id = int(value)
+
+    except (TypeError, ValueError):
+
+        return None
+
+    return faq_id if 1 <= faq_id <= len(faqs) else None
+
+
+def parse_confidence(value):
+
+    try:
+
+        return min(1.0, max(0.0, float(value)))
+
+    except (TypeError, ValueError):
+
+        return None
+
+
+def search_duckduckgo_for_answer(question: str, cancel_event=None) -> str:
 
     """
 
     Multiple fallback methods: Instant API → Web scraping → Direct answer
 
+    A set cancel_event (threading.Event) stops the search before its next step and returns None
+
     """
 
     try:
@@ -112,6 +347,12 @@ def search_duckduckgo_for_answer(question: str) -> str:
 
             return instant_result
 
+        if cancel_event is not None and cancel_event.is_set():
+
+            print("Search cancelled")
+
+            return None
+
         # Step 2: Try web scraping with content extraction
 
         print("Trying web scraping with content extraction...")
@@ -340,12 +581,23 @@ def search_duckduckgo_web_scraping_with_content(question: str) -> str:
 
             result_text = "Here's what I found on the official NYC ACS website:\n\n"
 
+            # Rank paragraphs of all result pages together so the budget goes to the most
+            # relevant ones and text repeated across pages is sent once
+            page_passages_list = [fetch_page_passages(result['link']) for result in extracted_results]
+            selected = select_passages(question, [passages or [] for passages in page_passages_list])
+
             for i, result in enumerate(extracted_results, 1):
 
                 result_text += f"**{i}. {result['title']}**\n"
                 result_text += f"{result['snippet']}\n"
-                extracted_text = extract_content_from_acs_page(result['link'])
-                result_text += f"{extracted_text}\n\n"
+                if page_passages_list[i - 1] is None:
+                    result_text += "Couldn't extract content from the official page.\n"
+                elif selected[i - 1]:
+                    result_text += "\n\n".join(selected[i - 1]) + "\n"
+                else:
+                    # Nothing on this page made the cut, say so as the per-page extractor did
+                    result_text += "No relevant text content found on this page.\n"
+                result_text += "\n"
 
             return result_text
 
@@ -567,9 +819,9 @@ def search_duckduckgo_web_scraping(question: str) -> str:
 
     return search_duckduckgo_web_scraping_with_content(question) or generate_direct_answer(question)
  
-def extract_content_from_acs_page(url: str, max_paragraphs: int = 3) -> str:
+def fetch_page_passages(url: str):
     """
-    Fetches and extracts readable text from a given ACS page.
+    Fetches an ACS page and returns its content paragraphs, or None if it can't be fetched.
     """
     try:
         headers = {
@@ -577,24 +829,8 @@ def extract_content_from_acs_page(url: str, max_paragraphs: int = 3) -> str:
         }
         response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Collect paragraphs from main content
-        paragraphs = soup.find_all('p')
-        clean_paragraphs = []
-
-        for p in paragraphs:
-            text = p.get_text(strip=True)
-            if len(text) > 40:  # Filter out short or empty lines
-                clean_paragraphs.append(text)
-            if len(clean_paragraphs) >= max_paragraphs:
-                break
-
-        if clean_paragraphs:
-            return "\n\n".join(clean_paragraphs)
-        else:
-            return "No relevant text content found on this page."
+        return page_passages(response.text)
 
     except Exception as e:
         print(f"Error extracting from {url}: {str(e)}")
-        return "Couldn't extract content from the official page." 
\ No newline at end of file
+        return None
@@ -0,0 +1,188 @@
+"""
+Offline warm-up of the precomputed answer store.
+
+Mines logged questions, groups near-duplicates to find the most asked
+topics, and runs every distinct question in the top clusters plus every
+question in faq_data.faqs through the normal answer pipeline, writing the
+results to ANSWER_STORE_PATH. Each answer is stored under its own question
+only; clusters just decide what gets precomputed and what the report lists.
+Ends with a report of how much of the logged traffic the store now covers.
+Live questions are only logged when QUESTION_LOG is set.
+
+    python -m warm_answers --log question_log.jsonl --top 50
+    python -m warm_answers --log question_log.jsonl --report-only
+"""
+
+import argparse
+import json
+from collections import Counter
+
+from answer_store import QUESTION_LOG, answer_store, question_key
+from faq_data import faqs
+from jsonl_log import log_files
+from retrieval import tokenize
+
+
+def read_logged_questions(paths: list) -> list:
+    """
+    Questions from JSON-lines logs ({"question": ...}) or plain text files with one question per line
+    """
+    questions = []
+    for path in paths:
+        with open(path, encoding="utf-8") as log:
+            for line in log:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    questions.append(line)
+                    continue
+                if isinstance(entry, dict) and isinstance(entry.get("question"), str) and entry["question"].strip():
+                    questions.append(entry["question"].strip())
+    return questions
+
+
+def cluster_questions(questions: list, similarity: float = 0.75) -> list:
+    """
+    Group near-duplicate questions, most asked first.
+
+    Questions with the same key always share a cluster; otherwise a question
+    joins the first cluster whose representative's content words overlap with
+    its own by at least `similarity` (Jaccard). Stop words are ignored, so a
+    cluster can hold questions with different answers ("can" / "can ... not");
+    clusters are only for ranking, never for sharing answers.
+    """
+    key_counts = Counter()
+    raw_forms = {}
+    for question in questions:
+        key = question_key(question)
+        if not key:
+            continue
+        key_counts[key] += 1
+        raw_forms.setdefault(key, Counter())[question] += 1
+
+    clusters = []
+    for key, count in key_counts.most_common():
+        words = set(tokenize(key))
+        for cluster in clusters:
+            union = words | cluster["words"]
+            if words and union and len(words & cluster["words"]) / len(union) >= similarity:
+                cluster["keys"].append(key)
+                cluster["questions"].append(raw_forms[key].most_common(1)[0][0])
+                cluster["count"] += count
+                break
+        else:
+            clusters.append({
+                "representative": raw_forms[key].most_common(1)[0][0],
+                "words": words,
+                "keys": [key],
+                "questions": [raw_forms[key].most_common(1)[0][0]],
+                "count": count,
+            })
+
+    clusters.sort(key=lambda cluster: -cluster["count"])
+    return clusters
+
+
+def precompute(clusters: list, top: int, include_faqs: bool = True, refresh: bool = False) -> dict:
+    """
+    Answer FAQ questions and every question of the top clusters through main.answer_question and store the results
+    """
+    # main builds the Azure client, so only import it when answers are actually computed
+    from main import answer_question
+
+    work = []
+    if include_faqs:
+        work += [faq["question"] for faq in faqs]
+    for cluster in clusters[:top]:
+        work += cluster["questions"]
+
+    counts = Counter()
+    done = set()
+    for question in work:
+        key = question_key(question)
+        if key in done:
+            continue
+        done.add(key)
+
+        existing = answer_store.entries.get(key)
+        if existing and not refresh and not answer_store.is_stale(existing):
+            counts["fresh"] += 1
+            continue
+
+        result = answer_question(question)
+        if result["source"] == "error":
+            print(f"Skipping {question!r}: the pipeline returned an error")
+            counts["errors"] += 1
+            continue
+        answer_store.put(question, result["answer"], result["source"], result["faq_id"])
+        counts[result["source"]] += 1
+
+    answer_store.save()
+    return dict(counts)
+
+
+def coverage_report(questions: list, clusters: list, show_uncovered: int = 10) -> str:
+    """
+    Share of logged questions (and distinct questions) that would be served from the store
+    """
+    covered = stale = 0
+    for question in questions:
+        entry = answer_store.entries.get(question_key(question))
+        if entry is None:
+            continue
+        if answer_store.is_stale(entry):
+            stale += 1
+        else:
+            covered += 1
+
+    distinct = {question_key(question) for question in questions} - {""}
+    distinct_covered = sum(
+        1 for key in distinct
+        if key in answer_store.entries and not answer_store.is_stale(answer_store.entries[key])
+    )
+
+    total = len(questions)
+    lines = [
+        f"Store entries:        {len(answer_store.entries)}",
+        f"Logged questions:     {total} ({len(distinct)} distinct, {len(clusters)} clusters)",
+        f"Traffic covered:      {covered}/{total} ({covered / total:.1%})" if total else "Traffic covered:      n/a",
+        f"Distinct covered:     {distinct_covered}/{len(distinct)}" if distinct else "Distinct covered:     n/a",
+        f"Covered but stale:    {stale}",
+    ]
+
+    uncovered = [cluster for cluster in clusters
+                 if not any(key in answer_store.entries for key in cluster["keys"])]
+    if uncovered:
+        lines.append("Most asked uncovered clusters:")
+        for cluster in uncovered[:show_uncovered]:
+            lines.append(f"  {cluster['count']:>5}  {cluster['representative']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", action="append", help="Question log to mine, may be repeated")
+    parser.add_argument("--top", type=int, default=50, help="Number of most asked clusters whose questions to precompute")
+    parser.add_argument("--similarity", type=float, default=0.75, help="Word overlap for near-duplicates")
+    parser.add_argument("--skip-faqs", action="store_true", help="Don't precompute the faq_data questions")
+    parser.add_argument("--refresh", action="store_true", help="Recompute entries that are still fresh")
+    parser.add_argument("--report-only", action="store_true", help="Only print the coverage report")
+    args = parser.parse_args()
+
+    # A rotated log is read along with the current one
+    logs = [path for log in args.log or ([QUESTION_LOG] if QUESTION_LOG else [])
+            for path in log_files(log) or [log]]
+    if not logs:
+        print("No question log (set QUESTION_LOG or pass --log), only the FAQ questions are precomputed")
+    logged = read_logged_questions(logs)
+    logged_clusters = cluster_questions(logged, args.similarity)
+
+    if not args.report_only:
+        print(f"Precomputing answers for {min(args.top, len(logged_clusters))} clusters"
+              f"{'' if args.skip_faqs else f' and {len(faqs)} FAQ questions'}")
+        print(precompute(logged_clusters, args.top, include_faqs=not args.skip_faqs, refresh=args.refresh))
+
+    print(coverage_report(logged, logged_clusters))
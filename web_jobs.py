@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_store import question_key
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when max_pending web searches are already queued or running
+    """
+
+
+class WebSearchJobs:
+    """
+    Runs slow web fallbacks in a bounded background pool, keyed by job ID.
+
+    submit() returns at once with a job the client can poll (get) or wait on
+    (wait). Jobs for the same normalised question share one search while it
+    is pending or its result is younger than ttl_seconds, so a burst of
+    identical questions costs one search. Finished jobs are dropped after
+    ttl_seconds; failed ones are kept for their pollers but never reused.
+    Jobs live in memory, so polls must reach the process that took the job.
+    """
+
+    def __init__(self, search, max_workers: int = 4, max_pending: int = 100, ttl_seconds: float = 600):
+        self.search = search
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._by_key = {}
+        self._stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, question: str, running=None) -> dict:
+        """
+        Start a job for the question, or join the one already running for it.
+
+        running is a future already searching for this question, such as a
+        speculated search; the job then takes its result instead of starting
+        a search of its own.
+        """
+        key = question_key(question)
+        with self._lock:
+            self._purge(time.monotonic())
+            job = self._jobs.get(self._by_key.get(key))
+            if job and job["status"] != "error":
+                self._stats["deduplicated"] += 1
+                return self._view(job)
+
+            pending = sum(1 for job in self._jobs.values() if job["status"] == "pending")
+            if pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise JobQueueFull(f"{pending} web searches already pending")
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "key": key,
+                "question": question,
+                "status": "pending",
+                "answer": None,
+                "error": None,
+                "created": time.monotonic(),
+                "finished": None,
+                "done": threading.Event(),
+            }
+            self._jobs[job["job_id"]] = job
+            self._by_key[key] = job["job_id"]
+            self._stats["submitted"] += 1
+
+        if running is None:
+            self._executor.submit(self._run, job, self.search, job["question"])
+        else:
+            running.add_done_callback(lambda future: self._run(job, future.result))
+        return self._view(job)
+
+    def _run(self, job: dict, search, *args):
+        try:
+            answer, status, error = search(*args), "done", None
+        except Exception as e:
+            print(f"Web search job {job['job_id']} failed: {e}")
+            answer, status, error = None, "error", str(e)
+        with self._lock:
+            job.update(answer=answer, status=status, error=error, finished=time.monotonic())
+            self._stats["completed" if status == "done" else "failed"] += 1
+        job["done"].set()
+
+    def get(self, job_id: str):
+        """
+        Current state of a job, or None if it is unknown or expired
+        """
+        with self._lock:
+            self._purge(time.monotonic())
+            job = self._jobs.get(job_id)
+            return self._view(job) if job else None
+
+    def wait(self, job_id: str, timeout: float):
+        """
+        Like get, but first waits up to timeout seconds for the job to finish
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            job["done"].wait(timeout)
+        return self.get(job_id)
+
+    def _purge(self, now: float):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished"] is not None and now - job["finished"] > self.ttl_seconds]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job["key"]) == job_id:
+                del self._by_key[job["key"]]
+
+    @staticmethod
+    def _view(job: dict) -> dict:
+        view = {"job_id": job["job_id"], "status": job["status"]}
+        if job["status"] == "done":
+            view["answer"] = job["answer"]
+        elif job["status"] == "error":
+            view["error"] = job["error"]
+        return view
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            return {
+                **self._stats,
+                "pending": statuses.count("pending"),
+                "stored": len(statuses),
+            }